@@ -0,0 +1,101 @@
+"""
+Answer many degrees-of-separation queries in one process.
+
+Usage: python batch.py directory [pairs.csv]
+
+Reads one "source,target" pair per line (person IDs, or names that
+match exactly one person) from the file or from stdin, and writes one
+JSON object per pair to stdout. Pairs that share a source are answered
+from a single BFS tree.
+"""
+
+import csv
+import json
+import sys
+
+import degrees
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python batch.py directory [pairs.csv]")
+
+    degrees.load_data(sys.argv[1], compact=True)
+
+    if len(sys.argv) == 3:
+        with open(sys.argv[2], encoding="utf-8") as f:
+            pairs = read_pairs(f)
+    else:
+        pairs = read_pairs(sys.stdin)
+
+    for result in solve(pairs):
+        print(json.dumps(result))
+
+
+def read_pairs(f):
+    """
+    Returns (source, target) pairs from CSV rows, skipping blank lines
+    and a leading "source,target" header.
+    """
+    pairs = []
+    for row in csv.reader(f):
+        if len(row) == 0:
+            continue
+        if len(pairs) == 0 and [value.strip().lower() for value in row] == ["source", "target"]:
+            continue
+        if len(row) != 2:
+            raise ValueError(f"expected source,target but got {row}")
+        pairs.append((row[0].strip(), row[1].strip()))
+    return pairs
+
+
+def resolve(value):
+    """
+    Returns the person_id for an ID or an unambiguous name, else None.
+    """
+    if value in degrees.people:
+        return value
+    person_ids = degrees.names.get(value.lower(), set())
+    if len(person_ids) == 1:
+        return next(iter(person_ids))
+    return None
+
+
+def solve(pairs):
+    """
+    Returns one result dict per (source, target) pair, in input order.
+
+    Pairs are grouped by source so each source needs one BFS, which
+    stops as soon as every target of that source has been reached.
+    """
+    results = [None] * len(pairs)
+    groups = {}
+    for i, (source, target) in enumerate(pairs):
+        source_id = resolve(source)
+        target_id = resolve(target)
+        if source_id is None or target_id is None:
+            results[i] = {
+                "source": source,
+                "target": target,
+                "error": "person not found"
+            }
+        else:
+            groups.setdefault(source_id, []).append((i, target_id))
+
+    graph = degrees.graph
+    for source_id, queries in groups.items():
+        tree = graph.tree(source_id, [target_id for _, target_id in queries])
+        for i, target_id in queries:
+            path = graph.path(tree, target_id)
+            results[i] = {
+                "source": source_id,
+                "target": target_id,
+                "degrees": None if path is None else len(path),
+                "path": path
+            }
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
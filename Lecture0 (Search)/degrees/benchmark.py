@@ -0,0 +1,491 @@
+"""
+Micro-benchmarks for the degrees search code.
+
+Usage: python benchmark.py frontier [n] [legacy_n]
+       python benchmark.py bidirectional [directory] [pairs]
+       python benchmark.py compact [directory] [pairs]
+       python benchmark.py snapshot [directory] [pairs]
+       python benchmark.py ingest [directory] [shards]
+       python benchmark.py batch [directory] [sources] [targets]
+       python benchmark.py stats [directory] [sources]
+       python benchmark.py landmark [directory] [pairs] [k]
+       python benchmark.py names [directory] [queries]
+       python benchmark.py nodes [directory] [pairs]
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import batch
+import degrees
+import ingest
+import landmarks
+import snapshot
+import stats
+from nameindex import NameIndex
+from util import Node, StackFrontier, QueueFrontier
+
+
+class DictNode():
+    """Node without __slots__, kept as a baseline."""
+
+    def __init__(self, state, parent, action):
+        self.state = state
+        self.parent = parent
+        self.action = action
+
+
+class ListStackFrontier():
+    """The original list-backed frontier, kept as a baseline."""
+
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier[-1]
+            self.frontier = self.frontier[:-1]
+            return node
+
+
+class ListQueueFrontier(ListStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier[0]
+            self.frontier = self.frontier[1:]
+            return node
+
+
+def push_pop(frontier_class, n):
+    """
+    Pushes n nodes through a frontier the way BFS does (membership
+    check before every add) and then drains it.
+    Returns elapsed seconds.
+    """
+    nodes = [Node(state=i, parent=None, action=None) for i in range(n)]
+    frontier = frontier_class()
+    start = time.perf_counter()
+    for node in nodes:
+        if not frontier.contains_state(node.state):
+            frontier.add(node)
+    while not frontier.empty():
+        frontier.remove()
+    return time.perf_counter() - start
+
+
+def bench_frontier(args):
+    """
+    Compares the deque-backed frontiers with the list-backed originals.
+
+    The originals are quadratic, so they run on `legacy_n` nodes
+    (defaults to 20,000) and are reported per operation alongside.
+    """
+    n = int(args[0]) if len(args) > 0 else 1_000_000
+    legacy_n = int(args[1]) if len(args) > 1 else min(n, 20_000)
+
+    print(f"{'frontier':<20}{'nodes':>10}{'total s':>12}{'us / node':>12}")
+    for frontier_class, count in [
+        (StackFrontier, n),
+        (QueueFrontier, n),
+        (ListStackFrontier, legacy_n),
+        (ListQueueFrontier, legacy_n)
+    ]:
+        elapsed = push_pop(frontier_class, count)
+        print(f"{frontier_class.__name__:<20}{count:>10}"
+              f"{elapsed:>12.3f}{elapsed / count * 1e6:>12.3f}")
+
+
+def sample_pairs(count, seed=0):
+    """Returns `count` random pairs of distinct person_ids."""
+    rng = random.Random(seed)
+    person_ids = sorted(degrees.people)
+    return [tuple(rng.sample(person_ids, 2)) for _ in range(count)]
+
+
+def time_search(search, pairs):
+    """
+    Runs `search` over every pair.
+    Returns total seconds, total people explored and the path lengths.
+    """
+    elapsed = 0
+    explored = 0
+    lengths = []
+    for source, target in pairs:
+        start = time.perf_counter()
+        path = search(source, target)
+        elapsed += time.perf_counter() - start
+        explored += degrees.num_explored
+        lengths.append(None if path is None else len(path))
+    return elapsed, explored, lengths
+
+
+def bench_bidirectional(args):
+    """
+    Compares one-sided BFS with bidirectional BFS on random pairs,
+    plus a few pairs of a person with themselves.
+    """
+    directory = args[0] if len(args) > 0 else "large"
+    count = int(args[1]) if len(args) > 1 else 100
+
+    degrees.load_data(directory)
+    pairs = sample_pairs(count)
+    pairs += [(source, source) for source, _ in pairs[:10]]
+    count = len(pairs)
+
+    print(f"{'search':<16}{'pairs':>8}{'explored':>12}{'total s':>10}{'ms / pair':>12}")
+    results = {}
+    for name in ["bfs", "bidirectional"]:
+        elapsed, explored, lengths = time_search(degrees.SEARCHES[name], pairs)
+        results[name] = lengths
+        print(f"{name:<16}{count:>8}{explored:>12}"
+              f"{elapsed:>10.3f}{elapsed / count * 1e3:>12.3f}")
+
+    if results["bfs"] != results["bidirectional"]:
+        sys.exit("Path lengths differ between searches.")
+
+
+def reset_data():
+    """Forgets everything load_data put into the degrees module."""
+    degrees.names = {}
+    degrees.people = {}
+    degrees.movies = {}
+    degrees.graph = None
+    degrees.name_index = None
+
+
+def bench_compact(args):
+    """
+    Compares the dict-of-sets tables with the CompactGraph: load time,
+    peak traced memory and search time over the same random pairs.
+    """
+    directory = args[0] if len(args) > 0 else "large"
+    count = int(args[1]) if len(args) > 1 else 100
+
+    print(f"{'layout':<10}{'load s':>10}{'peak MB':>10}{'explored':>12}{'search s':>10}")
+    results = {}
+    pairs = None
+    for name, compact in [("bfs", False), ("csr", True)]:
+        reset_data()
+        tracemalloc.start()
+        start = time.perf_counter()
+        degrees.load_data(directory, compact=compact, cache=False)
+        loaded = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        if pairs is None:
+            pairs = sample_pairs(count)
+        elapsed, explored, lengths = time_search(degrees.SEARCHES[name], pairs)
+        results[name] = lengths
+        print(f"{name:<10}{loaded:>10.3f}{peak / 2 ** 20:>10.1f}"
+              f"{explored:>12}{elapsed:>10.3f}")
+
+    if results["bfs"] != results["csr"]:
+        sys.exit("Path lengths differ between layouts.")
+
+
+def bench_snapshot(args):
+    """
+    Times a cold load from the CSV files (which writes the snapshot)
+    against a warm load from the snapshot, for both layouts, and the
+    same searches after each. Also checks that a truncated snapshot is
+    rejected rather than loaded.
+    """
+    directory = args[0] if len(args) > 0 else "large"
+    count = int(args[1]) if len(args) > 1 else 20
+
+    path = os.path.join(directory, snapshot.FILENAME)
+
+    print(f"{'layout':<10}{'cold s':>10}{'warm ms':>10}{'pairs':>8}"
+          f"{'cold search s':>15}{'warm search s':>15}")
+    pairs = None
+    for name, search in [("dict", "bfs"), ("compact", "csr")]:
+        if os.path.exists(path):
+            os.remove(path)
+        timings = []
+        searches = []
+        lengths = []
+        for _ in range(2):
+            reset_data()
+            start = time.perf_counter()
+            degrees.load_data(directory, compact=(name == "compact"))
+            timings.append(time.perf_counter() - start)
+
+            if pairs is None:
+                pairs = sample_pairs(count)
+            elapsed, _, found = time_search(degrees.SEARCHES[search], pairs)
+            searches.append(elapsed)
+            lengths.append(found)
+        print(f"{name:<10}{timings[0]:>10.3f}{timings[1] * 1e3:>10.3f}{count:>8}"
+              f"{searches[0]:>15.3f}{searches[1]:>15.3f}")
+        if lengths[0] != lengths[1]:
+            sys.exit("Path lengths differ after a warm load.")
+
+    # Replace rather than rewrite the file, which the loads above still map
+    reset_data()
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        with open(path + ".tmp", "wb") as f:
+            f.write(data[:len(data) // 2])
+        os.replace(path + ".tmp", path)
+        truncated = snapshot.load(directory)
+    finally:
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+    if truncated is not None:
+        sys.exit("A truncated snapshot was loaded.")
+
+
+def adjacency(graph):
+    """
+    Returns every person's movie IDs and every movie's star IDs, each
+    sorted, so graphs written in different orders can be compared.
+    """
+    people = {}
+    for p, person_id in enumerate(graph.person_ids):
+        movie_range = graph.person_movies[graph.person_offsets[p]:graph.person_offsets[p + 1]]
+        people[person_id] = sorted(graph.movie_ids[m] for m in movie_range)
+    movies = {}
+    for m, movie_id in enumerate(graph.movie_ids):
+        star_range = graph.movie_stars[graph.movie_offsets[m]:graph.movie_offsets[m + 1]]
+        movies[movie_id] = sorted(graph.person_ids[p] for p in star_range)
+    return people, movies
+
+
+def bench_ingest(args):
+    """
+    Writes the snapshot of a copy of the dataset with every star row
+    repeated with load_data in both layouts and with the streaming
+    ingester, times each and checks the three snapshots hold the same
+    graph.
+    """
+    directory = args[0] if len(args) > 0 else "large"
+    shards = int(args[1]) if len(args) > 1 else 4
+
+    with tempfile.TemporaryDirectory() as copy:
+        for filename in snapshot.CSV_FILES:
+            shutil.copy(os.path.join(directory, filename), copy)
+        with open(os.path.join(directory, "stars.csv"), encoding="utf-8") as f:
+            rows = f.readlines()[1:]
+        with open(os.path.join(copy, "stars.csv"), "a", encoding="utf-8") as f:
+            f.writelines(rows)
+
+        print(f"{'writer':<10}{'seconds':>10}{'stars':>10}")
+        graphs = {}
+        for name in ["dict", "compact", "ingest"]:
+            path = os.path.join(copy, snapshot.FILENAME)
+            if os.path.exists(path):
+                os.remove(path)
+            reset_data()
+            start = time.perf_counter()
+            if name == "ingest":
+                ingest.ingest(copy, shards, progress=None)
+            else:
+                degrees.load_data(copy, compact=(name == "compact"))
+            elapsed = time.perf_counter() - start
+
+            reset_data()
+            graph = snapshot.load_graph(copy)
+            graphs[name] = adjacency(graph)
+            print(f"{name:<10}{elapsed:>10.3f}{len(graph.person_movies):>10}")
+
+    if any(graph != graphs["dict"] for graph in graphs.values()):
+        sys.exit("Snapshots differ between writers.")
+
+
+def bench_batch(args):
+    """
+    Compares answering `sources` x `targets` pairs one search at a
+    time against the batch solver's shared BFS trees.
+    """
+    directory = args[0] if len(args) > 0 else "large"
+    num_sources = int(args[1]) if len(args) > 1 else 10
+    num_targets = int(args[2]) if len(args) > 2 else 100
+
+    degrees.load_data(directory, compact=True)
+    rng = random.Random(0)
+    person_ids = sorted(degrees.people)
+    pairs = [(source, rng.choice(person_ids))
+             for source in rng.sample(person_ids, num_sources)
+             for _ in range(num_targets)]
+
+    start = time.perf_counter()
+    single = [degrees.shortest_path_compact(source, target) for source, target in pairs]
+    single_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    grouped = batch.solve(pairs)
+    grouped_elapsed = time.perf_counter() - start
+
+    print(f"{'mode':<10}{'pairs':>8}{'total s':>10}{'pairs / s':>12}")
+    for name, elapsed in [("single", single_elapsed), ("batch", grouped_elapsed)]:
+        print(f"{name:<10}{len(pairs):>8}{elapsed:>10.3f}{len(pairs) / elapsed:>12.1f}")
+
+    if [None if path is None else len(path) for path in single] != \
+            [result["degrees"] for result in grouped]:
+        sys.exit("Degrees differ between modes.")
+
+
+def bench_stats(args):
+    """
+    Reports how the stats BFS sweep scales over 1, 2, 4 and all CPUs.
+    """
+    directory = args[0] if len(args) > 0 else "large"
+    count = int(args[1]) if len(args) > 1 else 200
+
+    degrees.load_data(directory, compact=True)
+    sources = stats.sample_sources(count)
+
+    print(f"{'workers':<10}{'sources':>8}{'total s':>10}{'speedup':>10}")
+    baseline = None
+    for workers in sorted({1, 2, 4, os.cpu_count()}):
+        start = time.perf_counter()
+        stats.compute(directory, sources, workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:<10}{len(sources):>8}{elapsed:>10.3f}{baseline / elapsed:>10.2f}")
+
+
+def bench_landmark(args):
+    """
+    Reports the landmark index build time, the cost and tightness of
+    its estimates, and how much it prunes the exact search.
+    """
+    directory = args[0] if len(args) > 0 else "large"
+    count = int(args[1]) if len(args) > 1 else 100
+    k = int(args[2]) if len(args) > 2 else landmarks.K
+
+    degrees.load_data(directory, compact=True)
+    pairs = sample_pairs(count)
+
+    index = landmarks.LandmarkIndex.build(degrees.graph, k)
+    degrees.landmark_index = index
+    print(f"Built {k} landmarks in {index.build_seconds:.3f}s")
+
+    start = time.perf_counter()
+    estimates = [index.estimate(degrees.graph, source, target) for source, target in pairs]
+    elapsed = time.perf_counter() - start
+    exact = sum(1 for lower, upper in estimates if lower == upper)
+    print(f"Estimates: {elapsed / count * 1e6:.1f} us / pair, {exact} of {count} exact")
+
+    print(f"{'search':<10}{'pairs':>8}{'explored':>12}{'total s':>10}")
+    results = {}
+    for name in ["csr", "landmark"]:
+        elapsed, explored, lengths = time_search(degrees.SEARCHES[name], pairs)
+        results[name] = lengths
+        print(f"{name:<10}{count:>8}{explored:>12}{elapsed:>10.3f}")
+
+    if results["csr"] != results["landmark"]:
+        sys.exit("Path lengths differ between searches.")
+    for (lower, upper), length in zip(estimates, results["csr"]):
+        if length is not None and not lower <= length <= upper:
+            sys.exit("Path length outside landmark bounds.")
+
+
+def misspell(name, rng):
+    """Returns `name` with one random character substituted, dropped or inserted."""
+    i = rng.randrange(len(name))
+    letter = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    return rng.choice([
+        name[:i] + letter + name[i + 1:],
+        name[:i] + name[i + 1:],
+        name[:i] + letter + name[i:]
+    ])
+
+
+def bench_names(args):
+    """
+    Times building the name index and exact, prefix and one-typo
+    fuzzy lookups of random names.
+    """
+    directory = args[0] if len(args) > 0 else "large"
+    count = int(args[1]) if len(args) > 1 else 100
+
+    degrees.load_data(directory, compact=True)
+    rng = random.Random(0)
+
+    start = time.perf_counter()
+    index = NameIndex(degrees.names)
+    print(f"Indexed {len(index.keys)} names in {time.perf_counter() - start:.3f}s")
+
+    queries = rng.sample(index.keys, min(count, len(index.keys)))
+    typos = [misspell(name, rng) for name in queries]
+    print(f"{'lookup':<10}{'queries':>8}{'ms / query':>12}{'found':>8}")
+    for name, lookup, inputs in [
+        ("exact", index.exact, queries),
+        ("prefix", lambda name: index.prefix(name[:len(name) // 2], 10), queries),
+        ("fuzzy", lambda name: index.fuzzy(name, 1), typos)
+    ]:
+        start = time.perf_counter()
+        found = sum(1 for query in inputs if lookup(query))
+        elapsed = time.perf_counter() - start
+        print(f"{name:<10}{len(inputs):>8}{elapsed / len(inputs) * 1e3:>12.3f}{found:>8}")
+
+
+def bench_nodes(args):
+    """
+    Compares shortest_path with the slotted Node against a Node with a
+    per-instance __dict__: search time and peak traced memory.
+    """
+    directory = args[0] if len(args) > 0 else "large"
+    count = int(args[1]) if len(args) > 1 else 20
+
+    degrees.load_data(directory)
+    pairs = sample_pairs(count)
+
+    print(f"{'node':<10}{'pairs':>8}{'explored':>12}{'total s':>10}{'peak MB':>10}")
+    for name, node_class in [("dict", DictNode), ("slots", Node)]:
+        degrees.Node = node_class
+        try:
+            tracemalloc.start()
+            elapsed, explored, _ = time_search(degrees.shortest_path, pairs)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        finally:
+            degrees.Node = Node
+        print(f"{name:<10}{count:>8}{explored:>12}{elapsed:>10.3f}{peak / 2 ** 20:>10.1f}")
+
+
+BENCHMARKS = {
+    "frontier": bench_frontier,
+    "bidirectional": bench_bidirectional,
+    "compact": bench_compact,
+    "snapshot": bench_snapshot,
+    "ingest": bench_ingest,
+    "batch": bench_batch,
+    "stats": bench_stats,
+    "landmark": bench_landmark,
+    "names": bench_names,
+    "nodes": bench_nodes,
+}
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        sys.exit(f"Usage: python benchmark.py [{'|'.join(BENCHMARKS)}] ...")
+    BENCHMARKS[sys.argv[1]](sys.argv[2:])
+
+
+if __name__ == "__main__":
+    main()
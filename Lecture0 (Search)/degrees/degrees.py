@@ -1,8 +1,17 @@
 import csv
 import sys
+from array import array
+from collections import Counter
 
+import landmarks
+import snapshot
+from graph import CompactGraph
+from nameindex import NameIndex
 from util import Node, StackFrontier, QueueFrontier
 
+# The three tables below are dicts after a load from the CSV files, and
+# read-only mappings over the snapshot after a warm load (see load_snapshot)
+
 # Maps names to a set of corresponding person_ids
 names = {}
 
@@ -12,54 +21,173 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# CompactGraph of who starred in what, when loaded with compact=True
+# or from a snapshot
+graph = None
+
+# LandmarkIndex over `graph`, when running in landmark mode
+landmark_index = None
+
+# NameIndex over `names`, built on first use
+name_index = None
+
+# Number of people expanded by the most recent search
+num_explored = 0
 
-def load_data(directory):
+# Rows of stars.csv skipped by the last load from the CSV files, by reason
+dropped = Counter()
+
+
+def load_data(directory, compact=False, cache=True):
     """
     Load data from CSV files into memory.
+
+    With `compact`, the star relation is kept only in `graph` and the
+    `people` and `movies` entries carry no "movies"/"stars" sets.
+
+    With `cache`, a fresh snapshot in `directory` is loaded instead of
+    the CSV files (see load_snapshot), and a missing or stale one is
+    rebuilt afterwards.
     """
+    global graph, people, movies, names, name_index
+
+    if cache and load_snapshot(directory, compact):
+        return
+
+    # Start from empty tables, which an earlier snapshot load may have
+    # left as read-only mappings
+    names, people, movies = {}, {}, {}
+    graph = None
+    name_index = None
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
+            add_person(row["id"], row["name"], row["birth"], compact)
 
     # Load movies
     with open(f"{directory}/movies.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
+            add_movie(row["id"], row["title"], row["year"], compact)
 
     # Load stars
+    dropped.clear()
+    if compact:
+        load_graph(directory)
+    else:
+        for person_id, movie_id in read_stars(directory):
+            people[person_id]["movies"].add(movie_id)
+            movies[movie_id]["stars"].add(person_id)
+
+    if cache:
+        try:
+            snapshot.save(directory, people, movies,
+                          graph if compact else CompactGraph.from_data(people, movies))
+        except OSError:
+            pass
+
+
+def add_person(person_id, name, birth, compact):
+    """Adds one person to `people` and `names`."""
+    people[person_id] = {
+        "name": name,
+        "birth": birth
+    }
+    if not compact:
+        people[person_id]["movies"] = set()
+    if name.lower() not in names:
+        names[name.lower()] = {person_id}
+    else:
+        names[name.lower()].add(person_id)
+
+
+def add_movie(movie_id, title, year, compact):
+    """Adds one movie to `movies`."""
+    movies[movie_id] = {
+        "title": title,
+        "year": year
+    }
+    if not compact:
+        movies[movie_id]["stars"] = set()
+
+
+def load_snapshot(directory, compact):
+    """
+    Load data from the snapshot in `directory`.
+    Returns False, leaving everything untouched, if it is missing or stale.
+
+    `people`, `movies` and `names` become read-only views over the mapped
+    snapshot, without the "movies"/"stars" sets, and the star relation is
+    kept only in `graph`, whether or not `compact` is set.
+    """
+    global graph, people, movies, names, name_index
+
+    restored = snapshot.load(directory)
+    if restored is None:
+        return False
+    graph, people, movies, names = restored
+    name_index = None
+    return True
+
+
+def read_stars(directory):
+    """
+    Yields (person_id, movie_id) for each row of stars.csv whose person
+    and movie are both loaded, counting the other rows in `dropped`.
+    """
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+            if row["person_id"] not in people:
+                dropped["unknown person"] += 1
+            elif row["movie_id"] not in movies:
+                dropped["unknown movie"] += 1
+            else:
+                yield row["person_id"], row["movie_id"]
+
+
+def load_graph(directory):
+    """
+    Load stars.csv straight into a CompactGraph over the loaded people and movies.
+    """
+    global graph
+
+    person_ids = list(people)
+    movie_ids = list(movies)
+    person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+    movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+    star_people = array("i")
+    star_movies = array("i")
+    for person_id, movie_id in read_stars(directory):
+        star_people.append(person_index[person_id])
+        star_movies.append(movie_index[movie_id])
+
+    graph = CompactGraph.from_stars(person_ids, movie_ids, star_people, star_movies,
+                                    person_index, movie_index)
+
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    global landmark_index
+
+    if len(sys.argv) > 3 or (len(sys.argv) == 3 and sys.argv[2] not in SEARCHES):
+        sys.exit(f"Usage: python degrees.py [directory] [{'|'.join(SEARCHES)}]")
+    directory = sys.argv[1] if len(sys.argv) >= 2 else "large"
+    mode = sys.argv[2] if len(sys.argv) == 3 else "bfs"
+    search = SEARCHES[mode]
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, compact=(mode in ["csr", "landmark"]))
     print("Data loaded.")
+    for reason, count in sorted(dropped.items()):
+        print(f"Skipped {count} rows of stars.csv ({reason}).")
+
+    if mode == "landmark":
+        landmark_index = landmarks.load_or_build(directory, graph)
+        print(f"Landmark index loaded (built in {landmark_index.build_seconds:.3f}s).")
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -68,7 +196,11 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if mode == "landmark":
+        lower, upper = landmark_index.estimate(graph, source, target)
+        print(f"Estimate: {lower} to {upper} degrees of separation.")
+
+    path = search(source, target)
 
     if path is None:
         print("Not connected.")
@@ -94,8 +226,13 @@ def shortest_path(source, target):
     """
 
     ##  Keep Track of State Explored  ##
+    global num_explored
     num_explored = 0
 
+    ##  A person is zero steps from themselves  ##
+    if source == target:
+        return []
+
     ##  Initialize frontier to just the starting position  ##
     start = Node(state=source, parent=None, action=None)
     frontier = QueueFrontier()
@@ -133,6 +270,130 @@ def shortest_path(source, target):
 
                 frontier.add(child)
 
+
+def shortest_path_compact(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching the CompactGraph.
+
+    If no possible path, returns None.
+    """
+    global num_explored
+    path = graph.shortest_path(source, target)
+    num_explored = graph.num_explored
+    return path
+
+
+def shortest_path_landmark(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, pruning the CompactGraph
+    search with the landmark index's distance bounds.
+
+    If no possible path, returns None.
+    """
+    global num_explored
+    path = landmark_index.shortest_path(graph, source, target)
+    num_explored = landmark_index.num_explored
+    return path
+
+
+def shortest_path_bidirectional(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching from both
+    ends at once and stopping where the two searches meet.
+
+    If no possible path, returns None.
+    """
+    global num_explored
+    num_explored = 0
+
+    ##  A person is zero steps from themselves  ##
+    if source == target:
+        return []
+
+    ##  Each side maps a person to the (movie_id, person_id) it was reached from  ##
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+
+        ##  Always grow the smaller side by one full level  ##
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = expand_level(forward_frontier, forward, backward)
+        else:
+            backward_frontier, meeting = expand_level(backward_frontier, backward, forward)
+
+        if meeting is not None:
+            return join_paths(meeting, forward, backward)
+
+    return None
+
+
+def expand_level(frontier, parents, other):
+    """
+    Expands every person in one BFS level of a bidirectional search.
+
+    Returns the next level and the person where the search met
+    the `other` side on the shortest combined path, or None.
+    """
+    global num_explored
+
+    level = []
+    meeting = None
+    best = None
+    for person_id in frontier:
+        num_explored += 1
+        for movie_id, neighbor in neighbors_for_person(person_id):
+            if neighbor in parents:
+                continue
+            parents[neighbor] = (movie_id, person_id)
+            level.append(neighbor)
+            if neighbor in other:
+                distance = chain_length(neighbor, other)
+                if best is None or distance < best:
+                    best = distance
+                    meeting = neighbor
+
+    return level, meeting
+
+
+def chain_length(person_id, parents):
+    """
+    Returns the number of hops from person_id back to the root of `parents`.
+    """
+    length = 0
+    while parents[person_id] is not None:
+        person_id = parents[person_id][1]
+        length += 1
+    return length
+
+
+def join_paths(meeting, forward, backward):
+    """
+    Joins the two halves of a bidirectional search at `meeting`
+    into one source-to-target list of (movie_id, person_id) pairs.
+    """
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, previous = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = previous
+    path.reverse()
+
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, following = backward[person_id]
+        path.append((movie_id, following))
+        person_id = following
+
+    return path
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
@@ -158,11 +419,26 @@ def person_id_for_name(name):
     else:
         return person_ids[0]
 
+def candidates_for_name(name, max_distance=2, limit=10):
+    """
+    Returns up to `limit` ranked (distance, person_id) candidates for a
+    name without prompting: exact matches, then names it is a prefix of,
+    then names within `max_distance` typos.
+    """
+    global name_index
+    if name_index is None:
+        name_index = NameIndex(names)
+    return name_index.search(name, max_distance, limit)
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors(person_id)
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -170,5 +446,14 @@ def neighbors_for_person(person_id):
             neighbors.add((movie_id, person_id))
     return neighbors
 
+
+# Search strategies selectable from the command line
+SEARCHES = {
+    "bfs": shortest_path,
+    "bidirectional": shortest_path_bidirectional,
+    "csr": shortest_path_compact,
+    "landmark": shortest_path_landmark,
+}
+
 if __name__ == "__main__":
     main()
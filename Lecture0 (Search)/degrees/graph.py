@@ -0,0 +1,248 @@
+from array import array
+
+# Distance recorded for people a BFS never reaches
+UNREACHABLE = 0xFFFF
+
+
+class CompactGraph():
+    """
+    Co-star graph stored in compressed-sparse-row form.
+
+    Person and movie IDs are interned to consecutive ints. The movies of
+    person `p` are `person_movies[person_offsets[p]:person_offsets[p + 1]]`
+    and the stars of movie `m` are `movie_stars[movie_offsets[m]:movie_offsets[m + 1]]`.
+
+    The ID-to-index maps are built on first use unless given, since
+    searches over person indices never need them.
+    """
+
+    def __init__(self, person_ids, movie_ids,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 person_index=None, movie_index=None):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        self._person_index = person_index
+        self._movie_index = movie_index
+
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+        self.num_explored = 0
+
+    @classmethod
+    def from_stars(cls, person_ids, movie_ids, star_people, star_movies,
+                   person_index=None, movie_index=None):
+        """
+        Builds the graph from parallel arrays of (person, movie) index pairs,
+        keeping the ID-to-index maps if the caller already has them.
+        """
+        person_offsets, person_movies = compress(
+            star_people, star_movies, len(person_ids)
+        )
+        movie_offsets, movie_stars = compress(
+            star_movies, star_people, len(movie_ids)
+        )
+        return cls(person_ids, movie_ids,
+                   person_offsets, person_movies, movie_offsets, movie_stars,
+                   person_index, movie_index)
+
+    @classmethod
+    def from_data(cls, people, movies):
+        """Builds the graph from the dict-based `people` and `movies` tables."""
+        person_ids = list(people)
+        movie_ids = list(movies)
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+
+        star_people = array("i")
+        star_movies = array("i")
+        for i, movie_id in enumerate(movie_ids):
+            for person_id in movies[movie_id]["stars"]:
+                star_people.append(person_index[person_id])
+                star_movies.append(i)
+        return cls.from_stars(person_ids, movie_ids, star_people, star_movies,
+                              person_index=person_index)
+
+    @property
+    def person_index(self):
+        """Map from person ID to person index."""
+        if self._person_index is None:
+            self._person_index = dict(zip(self.person_ids, range(len(self.person_ids))))
+        return self._person_index
+
+    @property
+    def movie_index(self):
+        """Map from movie ID to movie index."""
+        if self._movie_index is None:
+            self._movie_index = dict(zip(self.movie_ids, range(len(self.movie_ids))))
+        return self._movie_index
+
+    def neighbors(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        p = self.person_index[person_id]
+        neighbors = set()
+        for m in self.person_movies[self.person_offsets[p]:self.person_offsets[p + 1]]:
+            movie_id = self.movie_ids[m]
+            for q in self.movie_stars[self.movie_offsets[m]:self.movie_offsets[m + 1]]:
+                neighbors.add((movie_id, self.person_ids[q]))
+        return neighbors
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If no possible path, returns None.
+        """
+        tree = self.tree(source, [target])
+        return self.path(tree, target)
+
+    def tree(self, source, targets=None):
+        """
+        Runs BFS from the source, stopping once every person in `targets`
+        has been reached (or the component is exhausted if `targets` is None).
+
+        Returns the (parent, via) arrays: the parent person index and the
+        linking movie index of every reached person, -1 where unreached.
+        """
+        self.num_explored = 0
+        s = self.person_index[source]
+        remaining = None
+        if targets is not None:
+            remaining = {self.person_index[target] for target in targets} - {s}
+
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+
+        parent = array("i", [-1]) * len(self.person_ids)
+        via = array("i", [-1]) * len(self.person_ids)
+        parent[s] = s
+
+        # A movie's cast only needs to be scanned the first time it is reached
+        seen_movies = bytearray(len(self.movie_ids))
+
+        frontier = [s]
+        while frontier and remaining != set():
+            level = []
+            for p in frontier:
+                self.num_explored += 1
+                for m in person_movies[person_offsets[p]:person_offsets[p + 1]]:
+                    if seen_movies[m]:
+                        continue
+                    seen_movies[m] = 1
+                    for q in movie_stars[movie_offsets[m]:movie_offsets[m + 1]]:
+                        if parent[q] != -1:
+                            continue
+                        parent[q] = p
+                        via[q] = m
+                        level.append(q)
+                        if remaining is not None:
+                            remaining.discard(q)
+                            if not remaining:
+                                return parent, via
+            frontier = level
+
+        return parent, via
+
+    def levels(self, s):
+        """
+        Runs a full BFS from person index `s`, yielding the list of
+        person indices at each distance, starting with [s].
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+
+        seen = bytearray(len(self.person_ids))
+        seen_movies = bytearray(len(self.movie_ids))
+        seen[s] = 1
+
+        frontier = [s]
+        while frontier:
+            yield frontier
+            level = []
+            for p in frontier:
+                for m in person_movies[person_offsets[p]:person_offsets[p + 1]]:
+                    if seen_movies[m]:
+                        continue
+                    seen_movies[m] = 1
+                    for q in movie_stars[movie_offsets[m]:movie_offsets[m + 1]]:
+                        if not seen[q]:
+                            seen[q] = 1
+                            level.append(q)
+            frontier = level
+
+    def level_sizes(self, s):
+        """
+        Returns how many people are reached at each distance from
+        person index `s`, starting with 1 for `s` itself.
+        """
+        return [len(level) for level in self.levels(s)]
+
+    def distances(self, s):
+        """
+        Returns an array of every person's distance from person index `s`,
+        with UNREACHABLE for people in other components.
+        """
+        distances = array("H", [UNREACHABLE]) * len(self.person_ids)
+        for distance, level in enumerate(self.levels(s)):
+            for p in level:
+                distances[p] = distance
+        return distances
+
+    def path(self, tree, target):
+        """
+        Walks a BFS tree back from the target into (movie_id, person_id) pairs.
+        Returns None if the tree never reached the target.
+        """
+        parent, via = tree
+        t = self.person_index[target]
+        if parent[t] == -1:
+            return None
+
+        path = []
+        while parent[t] != t:
+            path.append((self.movie_ids[via[t]], self.person_ids[t]))
+            t = parent[t]
+        path.reverse()
+        return path
+
+
+def compress(keys, values, size):
+    """
+    Groups `values` by `keys` (ints below `size`) with a counting sort,
+    dropping repeated (key, value) pairs.
+    Returns the offsets and index arrays of the CSR layout.
+    """
+    offsets = array("q", [0]) * (size + 1)
+    for key in keys:
+        offsets[key + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    fill = offsets[:-1]
+    indices = array("i", [0]) * len(keys)
+    for key, value in zip(keys, values):
+        indices[fill[key]] = value
+        fill[key] += 1
+    return unique(offsets, indices)
+
+
+def unique(offsets, indices):
+    """
+    Drops repeated values within each group of a CSR layout, keeping the
+    first of each in order, as the dict tables' sets hold each star once.
+    Returns the new offsets and index arrays.
+    """
+    kept = array("i")
+    kept_offsets = array("q", [0])
+    for key in range(len(offsets) - 1):
+        kept.extend(dict.fromkeys(indices[offsets[key]:offsets[key + 1]]))
+        kept_offsets.append(len(kept))
+    return kept_offsets, kept
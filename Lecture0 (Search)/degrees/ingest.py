@@ -0,0 +1,275 @@
+"""
+Streaming ingestion of a degrees dataset into its binary snapshot.
+
+Usage: python ingest.py directory [shards]
+
+Parses the CSV files with csv.reader and positional columns, and
+reports rows per second and dropped rows for each table, then the peak
+memory of the whole run.
+The star table is never held in memory as Python objects: (person,
+movie) index pairs are partitioned into `shards` temporary files, and
+each shard is counting-sorted on its own, so only one shard at a time
+needs to fit in RAM.
+"""
+
+import csv
+import os
+import sys
+import tempfile
+import time
+from array import array
+from collections import Counter
+
+import snapshot
+from graph import unique
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Print progress every this many rows
+PROGRESS_ROWS = 1_000_000
+
+# Index pairs buffered per shard before they are flushed to disk
+BUFFER_PAIRS = 1 << 18
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python ingest.py directory [shards]")
+    directory = sys.argv[1]
+    shards = int(sys.argv[2]) if len(sys.argv) == 3 else 1
+
+    report = ingest(directory, shards)
+    print(f"{'table':<8}{'rows':>12}{'dropped':>10}{'seconds':>10}{'rows / s':>12}")
+    for table, stats in report.items():
+        print(f"{table:<8}{stats['rows']:>12}{sum(stats['dropped'].values()):>10}"
+              f"{stats['seconds']:>10.3f}{stats['rows'] / max(stats['seconds'], 1e-9):>12.0f}")
+        for reason, count in sorted(stats["dropped"].items()):
+            print(f"    dropped {count} ({reason})")
+
+    memory = peak_memory()
+    if memory is not None:
+        print(f"Peak memory: {memory / 2 ** 20:.1f} MB")
+
+
+def ingest(directory, shards=1, progress=sys.stderr):
+    """
+    Writes the snapshot for `directory` straight from its CSV files.
+
+    Returns a dict mapping each table to its stats: rows read, a Counter
+    of dropped rows by reason, and seconds taken. Progress lines go to
+    `progress` unless it is None.
+    """
+    csv_fingerprint = snapshot.fingerprint(directory)
+    report = {}
+
+    person_ids, people_fields, report["people"] = read_entities(
+        directory, "people", ["id", "name", "birth"], progress
+    )
+    movie_ids, movies_fields, report["movies"] = read_entities(
+        directory, "movies", ["id", "title", "year"], progress
+    )
+
+    with tempfile.TemporaryDirectory(dir=directory) as scratch:
+        by_person = Partition(scratch, "person", len(person_ids), shards)
+        by_movie = Partition(scratch, "movie", len(movie_ids), shards)
+        report["stars"] = read_stars(directory, person_ids, movie_ids,
+                                     by_person, by_movie, progress)
+
+        # A repeated star row is kept once, as in degrees.load_data
+        duplicates = by_person.sort()
+        by_movie.sort()
+        if duplicates:
+            report["stars"]["dropped"]["duplicate star"] += duplicates
+
+        snapshot.write(
+            directory, csv_fingerprint, by_person.total,
+            snapshot.encode(list(zip(*[iter(people_fields)] * 3)), by_name=True),
+            snapshot.encode(list(zip(*[iter(movies_fields)] * 3))),
+            [
+                [by_person.offsets().tobytes()],
+                (indices.tobytes() for indices in by_person.sorted_shards()),
+                [by_movie.offsets().tobytes()],
+                (indices.tobytes() for indices in by_movie.sorted_shards())
+            ]
+        )
+
+    return report
+
+
+def read_rows(directory, table, columns, stats, progress):
+    """
+    Yields the `columns` of each row of `table`.csv, picked by position
+    from the header. Rows with too few fields are counted as dropped.
+    """
+    path = os.path.join(directory, f"{table}.csv")
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        positions = [header.index(column) for column in columns]
+        width = max(positions) + 1
+        start = time.perf_counter()
+        for row in reader:
+            stats["rows"] += 1
+            if stats["rows"] % PROGRESS_ROWS == 0 and progress is not None:
+                elapsed = time.perf_counter() - start
+                print(f"{table}: {stats['rows']} rows ({stats['rows'] / elapsed:.0f} rows/s)",
+                      file=progress)
+            if len(row) < width:
+                stats["dropped"]["short row"] += 1
+                continue
+            yield [row[position] for position in positions]
+        stats["seconds"] = time.perf_counter() - start
+
+
+def new_stats():
+    """Returns empty per-table stats."""
+    return {"rows": 0, "dropped": Counter(), "seconds": 0.0}
+
+
+def read_entities(directory, table, columns, progress):
+    """
+    Reads an entity table (people or movies).
+    Returns the IDs in file order, their flattened fields and the stats.
+    As in degrees.load_data, a repeated ID keeps its first position but
+    takes the fields of its last row.
+    """
+    stats = new_stats()
+    ids = {}
+    fields = []
+    for row in read_rows(directory, table, columns, stats, progress):
+        if row[0] in ids:
+            stats["dropped"]["duplicate id"] += 1
+            i = ids[row[0]] * len(columns)
+            fields[i:i + len(columns)] = row
+            continue
+        ids[row[0]] = len(ids)
+        fields.extend(row)
+    return ids, fields, stats
+
+
+def read_stars(directory, person_ids, movie_ids, by_person, by_movie, progress):
+    """
+    Streams stars.csv into the two partitions as index pairs.
+    Returns the stats, counting rows that name an unknown person or movie.
+    """
+    stats = new_stats()
+    for person_id, movie_id in read_rows(directory, "stars", ["person_id", "movie_id"],
+                                         stats, progress):
+        p = person_ids.get(person_id)
+        m = movie_ids.get(movie_id)
+        if p is None:
+            stats["dropped"]["unknown person"] += 1
+        elif m is None:
+            stats["dropped"]["unknown movie"] += 1
+        else:
+            by_person.add(p, m)
+            by_movie.add(m, p)
+    by_person.flush()
+    by_movie.flush()
+    return stats
+
+
+class Partition():
+    """
+    (key, value) index pairs split by key range into shard files,
+    from which the CSR offsets and per-shard sorted values are built.
+    """
+
+    def __init__(self, directory, name, size, shards):
+        self.size = size
+        self.span = max(1, -(-size // shards))
+        self.counts = array("q", [0]) * size
+        self.total = 0
+        self.paths = [os.path.join(directory, f"{name}{i}.bin")
+                      for i in range(-(-size // self.span))]
+        self.buffers = [array("i") for _ in self.paths]
+        for path in self.paths:
+            open(path, "wb").close()
+
+    def add(self, key, value):
+        self.counts[key] += 1
+        self.total += 1
+        buffer = self.buffers[key // self.span]
+        buffer.append(key)
+        buffer.append(value)
+        if len(buffer) >= 2 * BUFFER_PAIRS:
+            self.flush_shard(key // self.span)
+
+    def flush(self):
+        for i in range(len(self.paths)):
+            self.flush_shard(i)
+
+    def flush_shard(self, i):
+        with open(self.paths[i], "ab") as f:
+            self.buffers[i].tofile(f)
+        del self.buffers[i][:]
+
+    def offsets(self):
+        """Returns the CSR offsets array."""
+        offsets = array("q", [0]) * (self.size + 1)
+        for key in range(self.size):
+            offsets[key + 1] = offsets[key] + self.counts[key]
+        return offsets
+
+    def sort(self):
+        """
+        Counting-sorts each shard by key and drops repeated pairs, one
+        shard in memory at a time, rewriting the shard file as its values
+        grouped by key and updating the counts to match.
+        Returns the number of pairs dropped.
+        """
+        dropped = 0
+        for i, path in enumerate(self.paths):
+            low = i * self.span
+            high = min(low + self.span, self.size)
+
+            pairs = array("i")
+            with open(path, "rb") as f:
+                pairs.frombytes(f.read())
+
+            starts = array("q", [0]) * (high - low + 1)
+            for key in range(low, high):
+                starts[key - low + 1] = starts[key - low] + self.counts[key]
+
+            fill = starts[:-1]
+            values = array("i", [0]) * (len(pairs) // 2)
+            for k in range(0, len(pairs), 2):
+                slot = pairs[k] - low
+                values[fill[slot]] = pairs[k + 1]
+                fill[slot] += 1
+
+            offsets, values = unique(starts, values)
+            for key in range(low, high):
+                kept = offsets[key - low + 1] - offsets[key - low]
+                dropped += self.counts[key] - kept
+                self.counts[key] = kept
+            with open(path, "wb") as f:
+                values.tofile(f)
+        self.total -= dropped
+        return dropped
+
+    def sorted_shards(self):
+        """
+        Yields each shard's values grouped by key, as left by sort, one
+        shard in memory at a time.
+        """
+        for path in self.paths:
+            values = array("i")
+            with open(path, "rb") as f:
+                values.frombytes(f.read())
+            yield values
+
+
+def peak_memory():
+    """Returns the peak resident memory of this process in bytes, if known."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+if __name__ == "__main__":
+    main()
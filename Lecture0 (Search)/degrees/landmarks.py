@@ -0,0 +1,238 @@
+"""
+Landmark distance index for fast degree-of-separation estimates.
+
+BFS distances from K high-degree people ("landmarks") bound the
+distance between any two people s and t by the triangle inequality:
+
+    max |d(L, s) - d(L, t)|  <=  d(s, t)  <=  min d(L, s) + d(L, t)
+
+The index is saved as landmarks.bin next to the CSV files and is
+rebuilt when those files or K change.
+"""
+
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+
+import snapshot
+from graph import UNREACHABLE
+
+FILENAME = "landmarks.bin"
+MAGIC = b"DEGLMK\0\0"
+VERSION = 1
+
+# Number of landmarks used unless told otherwise
+K = 16
+
+# magic, version, byte order, distance typecode, CSV fingerprint,
+# landmarks, people, build seconds
+HEADER = struct.Struct("<8sIBc2x6qqqd")
+
+
+class LandmarkIndex():
+
+    def __init__(self, landmarks, distances, build_seconds):
+        """
+        `landmarks` holds person indices and `distances[i][p]` the distance
+        from `landmarks[i]` to person `p`, with the typecode's maximum
+        value meaning unreachable.
+        """
+        self.landmarks = landmarks
+        self.distances = distances
+        self.build_seconds = build_seconds
+        self.unreachable = (1 << (8 * distances[0].itemsize)) - 1 if distances else None
+        self.num_explored = 0
+
+    @classmethod
+    def build(cls, graph, k=K):
+        """
+        Builds the index from BFS distances of the `k` people with the most movies.
+        """
+        start = time.perf_counter()
+        offsets = graph.person_offsets
+        landmarks = sorted(
+            range(len(graph.person_ids)),
+            key=lambda p: offsets[p + 1] - offsets[p],
+            reverse=True
+        )[:k]
+
+        distances = [graph.distances(landmark) for landmark in landmarks]
+
+        # One byte per entry is enough unless some distance reaches 255
+        if all(max((d for d in row if d != UNREACHABLE), default=0) < 0xFF
+               for row in distances):
+            distances = [array("B", (0xFF if d == UNREACHABLE else d for d in row))
+                         for row in distances]
+
+        return cls(landmarks, distances, time.perf_counter() - start)
+
+    @classmethod
+    def load(cls, directory, k=K):
+        """
+        Returns the index saved in `directory`, or None if it is
+        missing, stale or was built with a different `k`.
+        """
+        path = os.path.join(directory, FILENAME)
+        try:
+            with open(path, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        if len(buffer) < HEADER.size:
+            return None
+        header = HEADER.unpack_from(buffer)
+        magic, version, little_endian, typecode = header[:4]
+        csv_fingerprint = header[4:10]
+        num_landmarks, num_people, build_seconds = header[10:]
+        if (magic != MAGIC or version != VERSION
+                or little_endian != (sys.byteorder == "little")
+                or csv_fingerprint != snapshot.fingerprint(directory)
+                or num_landmarks != k):
+            return None
+
+        typecode = typecode.decode("ascii")
+        view = memoryview(buffer)
+        position = HEADER.size
+        landmarks = list(view[position:position + 4 * k].cast("i"))
+        position += 4 * k
+
+        size = num_people * struct.calcsize(typecode)
+        distances = []
+        for _ in range(k):
+            distances.append(view[position:position + size].cast(typecode))
+            position += size
+        return cls(landmarks, distances, build_seconds)
+
+    def save(self, directory):
+        """Writes the index to `directory`, replacing any previous one."""
+        typecode = "B" if self.distances[0].itemsize == 1 else "H"
+        header = HEADER.pack(
+            MAGIC, VERSION, sys.byteorder == "little", typecode.encode("ascii"),
+            *snapshot.fingerprint(directory),
+            len(self.landmarks), len(self.distances[0]), self.build_seconds
+        )
+
+        path = os.path.join(directory, FILENAME)
+        with open(path + ".tmp", "wb") as f:
+            f.write(header)
+            f.write(array("i", self.landmarks).tobytes())
+            for row in self.distances:
+                f.write(bytes(row))
+        os.replace(path + ".tmp", path)
+
+    def bounds(self, s, t):
+        """
+        Returns (lower, upper) bounds on the distance between person
+        indices `s` and `t`. Both are math.inf if the landmarks show they
+        are not connected; upper is math.inf if no landmark reaches them.
+        """
+        unreachable = self.unreachable
+        lower = 0
+        upper = math.inf
+        for row in self.distances:
+            ds = row[s]
+            dt = row[t]
+            if ds == unreachable and dt == unreachable:
+                continue
+            if ds == unreachable or dt == unreachable:
+                return math.inf, math.inf
+            lower = max(lower, abs(ds - dt))
+            upper = min(upper, ds + dt)
+        return lower, upper
+
+    def estimate(self, graph, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation
+        between two person_ids.
+        """
+        if source == target:
+            return 0, 0
+        return self.bounds(graph.person_index[source], graph.person_index[target])
+
+    def shortest_path(self, graph, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, or None if not connected.
+
+        The BFS does not expand anyone whose depth plus their landmark lower
+        bound to the target exceeds the landmark upper bound for the whole path.
+        """
+        self.num_explored = 0
+        s = graph.person_index[source]
+        t = graph.person_index[target]
+        if s == t:
+            return []
+
+        lower, upper = self.bounds(s, t)
+        if lower == math.inf:
+            return None
+
+        unreachable = self.unreachable
+        target_distances = [(row, row[t]) for row in self.distances
+                            if row[t] != unreachable]
+
+        parent = array("i", [-1]) * len(graph.person_ids)
+        via = array("i", [-1]) * len(graph.person_ids)
+        parent[s] = s
+        seen_movies = bytearray(len(graph.movie_ids))
+
+        depth = 0
+        frontier = [s]
+        while frontier:
+            level = []
+            slack = upper - depth
+            for p in frontier:
+
+                # Anyone whose depth plus lower bound to the target exceeds
+                # the upper bound cannot lie on a shortest path
+                for row, dt in target_distances:
+                    if not -slack <= row[p] - dt <= slack:
+                        break
+                else:
+                    self.num_explored += 1
+                    self.expand(graph, p, parent, via, seen_movies, level)
+                    if parent[t] != -1:
+                        return graph.path((parent, via), target)
+
+            frontier = level
+            depth += 1
+
+        return None
+
+    def expand(self, graph, p, parent, via, seen_movies, level):
+        """
+        Adds the unseen co-stars of person index `p` to `level`,
+        recording how each one was reached.
+        """
+        person_offsets = graph.person_offsets
+        movie_offsets = graph.movie_offsets
+        movie_stars = graph.movie_stars
+        for m in graph.person_movies[person_offsets[p]:person_offsets[p + 1]]:
+            if seen_movies[m]:
+                continue
+            seen_movies[m] = 1
+            for q in movie_stars[movie_offsets[m]:movie_offsets[m + 1]]:
+                if parent[q] == -1:
+                    parent[q] = p
+                    via[q] = m
+                    level.append(q)
+
+
+def load_or_build(directory, graph, k=K):
+    """
+    Returns the landmark index for `directory`, building and saving
+    it if the saved one is missing or stale.
+    """
+    index = LandmarkIndex.load(directory, k)
+    if index is None:
+        index = LandmarkIndex.build(graph, k)
+        try:
+            index.save(directory)
+        except OSError:
+            pass
+    return index
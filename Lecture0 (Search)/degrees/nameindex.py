@@ -0,0 +1,117 @@
+"""
+Sorted-array index over lowercased names for exact, prefix and
+bounded edit-distance lookups.
+
+Fuzzy search walks the sorted names as an implicit trie: neighbouring
+names share their common prefix's edit-distance rows, and once a
+prefix can no longer come within the distance bound, bisect skips
+every name that starts with it.
+"""
+
+from bisect import bisect_left
+
+
+class NameIndex():
+
+    def __init__(self, names):
+        """`names` maps lowercased names to sets of person_ids, as in degrees.names."""
+        self.names = names
+        self.keys = sorted(names)
+
+    def exact(self, name):
+        """Returns the sorted person_ids whose name is exactly `name`, ignoring case."""
+        return sorted(self.names.get(name.lower(), ()))
+
+    def prefix(self, prefix, limit=None):
+        """
+        Returns up to `limit` names (lowercased, in sorted order)
+        that start with `prefix`, ignoring case.
+        """
+        prefix = prefix.lower()
+        matches = []
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and self.keys[i].startswith(prefix):
+            if limit is not None and len(matches) >= limit:
+                break
+            matches.append(self.keys[i])
+            i += 1
+        return matches
+
+    def fuzzy(self, name, max_distance=2):
+        """
+        Returns (distance, name) for every name within `max_distance`
+        edits (insertions, deletions, substitutions) of `name`, ignoring case.
+        """
+        query = name.lower()
+        keys = self.keys
+        matches = []
+
+        # rows[d] holds the edit distances between the first d characters
+        # of the current key and every prefix of the query
+        rows = [list(range(len(query) + 1))]
+        previous = ""
+        i = 0
+        while i < len(keys):
+            key = keys[i]
+
+            # Reuse the rows of the prefix shared with the previous key
+            common = 0
+            shared = min(len(key), len(previous), len(rows) - 1)
+            while common < shared and key[common] == previous[common]:
+                common += 1
+            del rows[common + 1:]
+            previous = key
+
+            dead = False
+            for depth in range(common, len(key)):
+                above = rows[depth]
+                row = [above[0] + 1]
+                char = key[depth]
+                for j in range(1, len(query) + 1):
+                    row.append(min(
+                        above[j] + 1,
+                        row[j - 1] + 1,
+                        above[j - 1] + (query[j - 1] != char)
+                    ))
+                rows.append(row)
+
+                # No key starting with this prefix can come within the bound
+                if min(row) > max_distance:
+                    prefix = key[:depth + 1]
+                    i = bisect_left(keys, prefix[:-1] + chr(ord(prefix[-1]) + 1), i + 1)
+                    dead = True
+                    break
+
+            if dead:
+                continue
+            if rows[-1][-1] <= max_distance:
+                matches.append((rows[-1][-1], key))
+            i += 1
+
+        return sorted(matches)
+
+    def search(self, name, max_distance=2, limit=10):
+        """
+        Returns up to `limit` ranked (distance, person_id) candidates for
+        `name`: exact matches first, then names that start with it, then
+        the other names within `max_distance` edits, each group by edit
+        distance and then by name. A prefix match's distance is the
+        number of characters it adds, whatever `max_distance` is.
+        """
+        query = name.lower()
+        matches = self.fuzzy(name, max_distance)
+        ranked = [(distance, key) for distance, key in matches if distance == 0]
+        ranked += sorted(
+            (len(key) - len(query), key)
+            for key in self.prefix(query, limit + 1) if key != query
+        )
+        ranked += [(distance, key) for distance, key in matches
+                   if distance > 0 and not key.startswith(query)]
+
+        candidates = []
+        for distance, key in ranked:
+            for person_id in sorted(self.names[key]):
+                candidates.append((distance, person_id))
+                if len(candidates) >= limit:
+                    return candidates
+        return candidates
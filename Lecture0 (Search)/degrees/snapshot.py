@@ -0,0 +1,341 @@
+"""
+Binary snapshot of a degrees dataset.
+
+Layout (native byte order, every section padded to 8 bytes):
+
+    header          MAGIC, VERSION, byte order, CSV fingerprint, counts
+    person_offsets  int64 * (people + 1)
+    person_movies   int32 * stars
+    movie_offsets   int64 * (movies + 1)
+    movie_stars     int32 * stars
+    person_records  int64 * (people + 1)    start of each person in `people`
+    person_by_id    int32 * people          person indices sorted by id
+    person_by_name  int32 * people          person indices sorted by lowercased name
+    movie_records   int64 * (movies + 1)    start of each movie in `movies`
+    movie_by_id     int32 * movies          movie indices sorted by id
+    people          utf-8 "id\\0name\\0birth" for every person, back to back
+    movies          utf-8 "id\\0title\\0year" for every movie, back to back
+
+Everything is memory-mapped on load rather than copied. People, movies
+and names are decoded one record at a time when they are looked up, by
+binary search over the sorted index sections, so a warm load creates no
+Python object per row. The graph's ID lists are decoded in one pass the
+first time a search needs them.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+
+from graph import CompactGraph
+
+FILENAME = "degrees.snapshot"
+MAGIC = b"DEGSNAP\0"
+VERSION = 2
+CSV_FILES = ["people.csv", "movies.csv", "stars.csv"]
+
+# magic, version, byte order, (mtime_ns, size) per CSV,
+# people, movies, stars, people bytes, movies bytes
+HEADER = struct.Struct("<8sIB3x6q5q")
+
+
+def fingerprint(directory):
+    """Returns (mtime_ns, size) for each CSV file the snapshot is built from."""
+    values = []
+    for filename in CSV_FILES:
+        stat = os.stat(os.path.join(directory, filename))
+        values.extend([stat.st_mtime_ns, stat.st_size])
+    return tuple(values)
+
+
+def save(directory, people, movies, graph):
+    """Writes the snapshot for `directory`, replacing any previous one."""
+    write(directory, fingerprint(directory), len(graph.person_movies),
+          encode([(person_id, people[person_id]["name"], people[person_id]["birth"])
+                  for person_id in graph.person_ids], by_name=True),
+          encode([(movie_id, movies[movie_id]["title"], movies[movie_id]["year"])
+                  for movie_id in graph.movie_ids]),
+          [
+              [array("q", graph.person_offsets).tobytes()],
+              [array("i", graph.person_movies).tobytes()],
+              [array("q", graph.movie_offsets).tobytes()],
+              [array("i", graph.movie_stars).tobytes()]
+          ])
+
+
+def encode(rows, by_name=False):
+    """
+    Encodes (id, name, extra) rows, in index order, as a records table:
+    (blob, record offsets, indices sorted by id, indices sorted by
+    lowercased name or None).
+    """
+    offsets = array("q", [0])
+    chunks = []
+    size = 0
+    for row in rows:
+        chunk = "\0".join(row).encode("utf-8")
+        chunks.append(chunk)
+        size += len(chunk)
+        offsets.append(size)
+    by_id = array("i", sorted(range(len(rows)), key=lambda i: rows[i][0]))
+    names = None
+    if by_name:
+        names = array("i", sorted(range(len(rows)), key=lambda i: rows[i][1].lower()))
+    return b"".join(chunks), offsets, by_id, names
+
+
+def write(directory, csv_fingerprint, num_stars, people, movies, arrays):
+    """
+    Writes a snapshot file from its parts. `people` and `movies` are
+    records tables from encode. `arrays` holds the four adjacency
+    sections, each as an iterable of byte chunks, so that callers can
+    stream them without holding a whole section in memory.
+    """
+    people_blob, person_records, person_by_id, person_by_name = people
+    movies_blob, movie_records, movie_by_id, _ = movies
+    header = HEADER.pack(
+        MAGIC, VERSION, sys.byteorder == "little", *csv_fingerprint,
+        len(person_records) - 1, len(movie_records) - 1, num_stars,
+        len(people_blob), len(movies_blob)
+    )
+
+    sections = [[header], *arrays]
+    for table in [person_records, person_by_id, person_by_name, movie_records, movie_by_id]:
+        sections.append([table.tobytes()])
+    sections += [[people_blob], [movies_blob]]
+
+    path = os.path.join(directory, FILENAME)
+    with open(path + ".tmp", "wb") as f:
+        for section in sections:
+            size = 0
+            for chunk in section:
+                f.write(chunk)
+                size += len(chunk)
+            f.write(bytes(-size % 8))
+    os.replace(path + ".tmp", path)
+
+
+def load(directory):
+    """
+    Returns (graph, people, movies, names) from the snapshot for
+    `directory`: read-only mappings shaped like degrees.people,
+    degrees.movies and degrees.names, minus the "movies" and "stars" sets.
+
+    Returns None if there is no snapshot or it no longer matches the CSV files.
+    """
+    mapped = open_sections(directory)
+    if mapped is None:
+        return None
+    counts, section = mapped
+    num_people, num_movies, num_stars, people_bytes, movies_bytes = counts
+
+    adjacency = [
+        section(num_people + 1, "q"), section(num_stars, "i"),
+        section(num_movies + 1, "q"), section(num_stars, "i"),
+    ]
+    person_records = section(num_people + 1, "q")
+    person_by_id = section(num_people, "i")
+    person_by_name = section(num_people, "i")
+    movie_records = section(num_movies + 1, "q")
+    movie_by_id = section(num_movies, "i")
+    people_blob = section(people_bytes)
+    movies_blob = section(movies_bytes)
+
+    people = Records(people_blob, person_records, person_by_id, ["name", "birth"])
+    movies = Records(movies_blob, movie_records, movie_by_id, ["title", "year"])
+    names = Names(people, person_by_name)
+    graph = CompactGraph(people.ids(), movies.ids(), *adjacency)
+    return graph, people, movies, names
+
+
+def load_graph(directory):
+    """
+    Returns just the CompactGraph from the snapshot for `directory`, or
+    None if there is none or it is stale. Its IDs stay encoded in the
+    mapped records until first used, so a search over person indices
+    only ever reads the four adjacency sections.
+    """
+    restored = load(directory)
+    return None if restored is None else restored[0]
+
+
+def open_sections(directory):
+    """
+    Maps the snapshot for `directory` and checks its header.
+    Returns the header counts and a function that returns each section
+    in turn as a memoryview (cast to `typecode` if given), or None if
+    the snapshot is missing or stale.
+    """
+    path = os.path.join(directory, FILENAME)
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(buffer) < HEADER.size:
+        return None
+    header = HEADER.unpack_from(buffer)
+    magic, version, little_endian = header[:3]
+    csv_fingerprint = header[3:9]
+    if (magic != MAGIC or version != VERSION
+            or little_endian != (sys.byteorder == "little")
+            or csv_fingerprint != fingerprint(directory)
+            or len(buffer) != file_size(*header[9:])):
+        return None
+
+    view = memoryview(buffer)
+    position = HEADER.size + (-HEADER.size % 8)
+
+    def section(length, typecode=None):
+        nonlocal position
+        size = length * (struct.calcsize(typecode) if typecode else 1)
+        chunk = view[position:position + size]
+        position += size + (-size % 8)
+        return chunk.cast(typecode) if typecode else chunk
+
+    return header[9:], section
+
+
+def file_size(num_people, num_movies, num_stars, people_bytes, movies_bytes):
+    """Returns the length in bytes of a snapshot with these header counts."""
+    sections = [
+        HEADER.size,
+        8 * (num_people + 1), 4 * num_stars, 8 * (num_movies + 1), 4 * num_stars,
+        8 * (num_people + 1), 4 * num_people, 4 * num_people,
+        8 * (num_movies + 1), 4 * num_movies,
+        people_bytes, movies_bytes,
+    ]
+    return sum(length + -length % 8 for length in sections)
+
+
+def lower_bound(order, key, value_of):
+    """
+    Returns the first position in `order` whose value_of(order[i]) is
+    not below `key`, for `order` sorted by value_of.
+    """
+    low, high = 0, len(order)
+    while low < high:
+        middle = (low + high) // 2
+        if value_of(order[middle]) < key:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+class Records(Mapping):
+    """
+    Read-only map from ID to a dict of fields, decoded from the mapped
+    records table on each lookup.
+    """
+
+    def __init__(self, blob, offsets, by_id, fields):
+        self.blob = blob
+        self.offsets = offsets
+        self.by_id = by_id
+        self.fields = fields
+
+    def record(self, i):
+        """Returns the fields of record `i`, ID first."""
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8").split("\0")
+
+    def id(self, i):
+        """Returns the ID of record `i`."""
+        return self.record(i)[0]
+
+    def position(self, key):
+        """Returns the index of the record with ID `key`, or None."""
+        i = lower_bound(self.by_id, key, self.id)
+        if i < len(self.by_id) and self.id(self.by_id[i]) == key:
+            return self.by_id[i]
+        return None
+
+    def ids(self):
+        """Returns the record IDs as a lazy sequence."""
+        return Ids(self)
+
+    def __getitem__(self, key):
+        i = self.position(key)
+        if i is None:
+            raise KeyError(key)
+        return dict(zip(self.fields, self.record(i)[1:]))
+
+    def __contains__(self, key):
+        return self.position(key) is not None
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.id(i)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+class Ids():
+    """
+    Sequence of the IDs of a Records table, by record index. The IDs are
+    decoded into a list all at once on first use, so searches that walk
+    many neighbours index a plain list rather than the mapped records.
+    """
+
+    def __init__(self, records):
+        self.records = records
+        self.decoded = None
+
+    def ids(self):
+        """Returns the list of IDs, decoding it on first use."""
+        if self.decoded is None:
+            self.decoded = [self.records.id(i) for i in range(len(self.records))]
+        return self.decoded
+
+    def __getitem__(self, i):
+        return self.ids()[i]
+
+    def __iter__(self):
+        return iter(self.ids())
+
+    def __len__(self):
+        return len(self.records)
+
+
+class Names(Mapping):
+    """
+    Read-only map from lowercased name to the set of person IDs with
+    that name, found by binary search over the people sorted by name.
+    """
+
+    def __init__(self, people, by_name):
+        self.people = people
+        self.by_name = by_name
+        self.count = None
+
+    def name(self, i):
+        """Returns the lowercased name of person record `i`."""
+        return self.people.record(i)[1].lower()
+
+    def __getitem__(self, name):
+        i = lower_bound(self.by_name, name, self.name)
+        person_ids = set()
+        while i < len(self.by_name) and self.name(self.by_name[i]) == name:
+            person_ids.add(self.people.id(self.by_name[i]))
+            i += 1
+        if not person_ids:
+            raise KeyError(name)
+        return person_ids
+
+    def __iter__(self):
+        previous = None
+        for i in self.by_name:
+            name = self.name(i)
+            if name != previous:
+                yield name
+                previous = name
+
+    def __len__(self):
+        if self.count is None:
+            self.count = sum(1 for _ in self)
+        return self.count
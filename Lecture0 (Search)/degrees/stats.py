@@ -0,0 +1,122 @@
+"""
+Graph-wide separation statistics for a degrees dataset.
+
+Usage: python stats.py directory [sources] [workers] [eccentricity.csv]
+
+Runs a full BFS from every person (or from a random sample of
+`sources` people) across a pool of worker processes, then prints the
+distribution of degrees of separation, the average path length and
+the distribution of eccentricities. Per-person eccentricities are
+written to the optional CSV file.
+"""
+
+import csv
+import multiprocessing
+import random
+import sys
+from collections import Counter
+
+import degrees
+import snapshot
+
+# CompactGraph used by the searches in this process
+graph = None
+
+
+def main():
+    if len(sys.argv) < 2 or len(sys.argv) > 5:
+        sys.exit("Usage: python stats.py directory [sources] [workers] [eccentricity.csv]")
+    directory = sys.argv[1]
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else multiprocessing.cpu_count()
+
+    print("Loading data...")
+    degrees.load_data(directory, compact=True)
+    print("Data loaded.")
+
+    sources = sample_sources(count)
+    separations, eccentricities = compute(directory, sources, workers)
+    report(separations, eccentricities)
+
+    if len(sys.argv) > 4:
+        with open(sys.argv[4], "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["person_id", "eccentricity"])
+            for s, eccentricity in sorted(eccentricities.items()):
+                writer.writerow([degrees.graph.person_ids[s], eccentricity])
+
+
+def sample_sources(count=None, seed=0):
+    """
+    Returns the person indices to search from: everyone if `count` is
+    None, else a random sample of `count` people.
+    """
+    total = len(degrees.graph.person_ids)
+    if count is None or count >= total:
+        return list(range(total))
+    return random.Random(seed).sample(range(total), count)
+
+
+def compute(directory, sources, workers):
+    """
+    Runs a BFS from each source across `workers` processes.
+
+    Returns a Counter of degrees of separation over all reached
+    (source, person) pairs and a dict of each source's eccentricity
+    within its connected component.
+    """
+    separations = Counter()
+    eccentricities = {}
+    chunksize = max(1, len(sources) // (workers * 16))
+
+    # Without a snapshot to map, hand the workers the parent's graph:
+    # inherited for free under fork, pickled once per worker otherwise
+    mapped = snapshot.load_graph(directory) is not None
+    if not mapped and degrees.graph is None:
+        raise RuntimeError(f"no snapshot in {directory} and no graph loaded to search")
+    inherited = None if mapped else degrees.graph
+
+    with multiprocessing.Pool(workers, initializer=init_worker,
+                              initargs=(directory, inherited)) as pool:
+        for s, sizes in pool.imap_unordered(search, sources, chunksize):
+            for distance, size in enumerate(sizes[1:], start=1):
+                separations[distance] += size
+            eccentricities[s] = len(sizes) - 1
+    return separations, eccentricities
+
+
+def init_worker(directory, inherited):
+    """
+    Maps the snapshot's adjacency arrays into the worker so every process
+    reads the same pages instead of receiving a pickled copy. Uses the
+    `inherited` graph when there is no snapshot.
+    """
+    global graph
+    graph = snapshot.load_graph(directory) if inherited is None else inherited
+
+
+def search(s):
+    """Returns the source and its BFS level sizes."""
+    return s, graph.level_sizes(s)
+
+
+def report(separations, eccentricities):
+    """Prints the separation and eccentricity distributions."""
+    pairs = sum(separations.values())
+    print(f"Sources: {len(eccentricities)}")
+    print(f"Connected pairs: {pairs}")
+    if pairs:
+        average = sum(distance * size for distance, size in separations.items()) / pairs
+        print(f"Average path length: {average:.3f}")
+
+    print("Degrees of separation:")
+    for distance in sorted(separations):
+        print(f"  {distance}: {separations[distance]}")
+
+    print("Eccentricity:")
+    for eccentricity, size in sorted(Counter(eccentricities.values()).items()):
+        print(f"  {eccentricity}: {size}")
+
+
+if __name__ == "__main__":
+    main()
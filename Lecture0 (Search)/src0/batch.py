@@ -0,0 +1,66 @@
+"""
+Solve every maze file in a directory across a pool of processes.
+
+Usage: python batch.py directory [method] [workers]
+
+Writes one CSV row per maze to stdout with the number of states
+explored, the solution length and the solve time in milliseconds.
+"""
+
+import csv
+import multiprocessing
+import os
+import sys
+import time
+
+from maze import Maze, SOLVERS
+
+FIELDS = ["maze", "method", "explored", "path_length", "solve_ms", "error"]
+
+
+def main():
+    if len(sys.argv) not in [2, 3, 4] or (len(sys.argv) > 2 and sys.argv[2] not in SOLVERS):
+        sys.exit(f"Usage: python batch.py directory [{'|'.join(SOLVERS)}] [workers]")
+    directory = sys.argv[1]
+    method = sys.argv[2] if len(sys.argv) > 2 else "bfs"
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count()
+
+    filenames = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.endswith(".txt")
+    )
+
+    writer = csv.DictWriter(sys.stdout, fieldnames=FIELDS)
+    writer.writeheader()
+    for row in solve_all(filenames, method, workers):
+        writer.writerow(row)
+
+
+def solve_all(filenames, method="bfs", workers=None):
+    """
+    Solves each maze file with `method` across `workers` processes.
+    Returns one stats dict per file, in the order given.
+    """
+    with multiprocessing.Pool(workers) as pool:
+        return pool.starmap(solve_file, [(filename, method) for filename in filenames])
+
+
+def solve_file(filename, method="bfs"):
+    """Solves one maze file and returns its stats."""
+    row = dict.fromkeys(FIELDS, "")
+    row["maze"] = filename
+    row["method"] = method
+    try:
+        maze = Maze(filename)
+        start = time.perf_counter()
+        maze.solve(method)
+        row["solve_ms"] = f"{(time.perf_counter() - start) * 1e3:.3f}"
+        row["explored"] = maze.num_explored
+        row["path_length"] = len(maze.solution[0])
+    except Exception as e:
+        row["error"] = str(e)
+    return row
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Benchmarks for the maze solvers.
+
+Usage: python benchmark.py nodes [size]
+       python benchmark.py informed [sizes...]
+       python benchmark.py wavefront [sizes...]
+       python benchmark.py stream [size]
+       python benchmark.py jps [sizes...]
+       python benchmark.py render [sizes...]
+       python benchmark.py field [size] [queries]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import maze
+
+
+class DictNode():
+    """Node without __slots__, kept as a baseline."""
+
+    def __init__(self, state, parent, action):
+        self.state = state
+        self.parent = parent
+        self.action = action
+
+
+def generate(height, width, density=0.25, seed=0):
+    """
+    Returns the text of a random maze with start in the top-left corner,
+    goal in the bottom-right and each other cell a wall with `density`
+    probability. The maze may have no solution.
+    """
+    rng = random.Random(seed)
+    rows = []
+    for i in range(height):
+        row = ["#" if rng.random() < density else " " for _ in range(width)]
+        rows.append(row)
+    rows[0][0] = "A"
+    rows[-1][-1] = "B"
+    return "\n".join("".join(row) for row in rows) + "\n"
+
+
+def generate_rooms(height, width, room=20, seed=0):
+    """
+    Returns the text of a maze of open square rooms separated by
+    one-cell walls, each wall with one random doorway, with the start in
+    the top-left corner and the goal in the bottom-right.
+    """
+    rng = random.Random(seed)
+    rows = [[" "] * width for _ in range(height)]
+    for i in range(room, height - 1, room + 1):
+        for j in range(width):
+            rows[i][j] = "#"
+        for left in range(0, width, room + 1):
+            rows[i][rng.randrange(left, min(left + room, width))] = " "
+    for j in range(room, width - 1, room + 1):
+        for i in range(height):
+            if rows[i][j] == " " and (i + 1) % (room + 1) != 0:
+                rows[i][j] = "#"
+        for top in range(0, height, room + 1):
+            rows[rng.randrange(top, min(top + room, height))][j] = " "
+    rows[0][0] = "A"
+    rows[-1][-1] = "B"
+    return "\n".join("".join(row) for row in rows) + "\n"
+
+
+def load_generated(height, width, density=0.25, seed=0):
+    """Returns a Maze built from a generated maze file, retrying seeds until it is solvable."""
+    while True:
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write(generate(height, width, density, seed))
+        try:
+            m = maze.Maze(f.name)
+        finally:
+            os.remove(f.name)
+        try:
+            m.solve()
+        except Exception:
+            seed += 1
+            continue
+        m.solution = None
+        return m
+
+
+def measure(solve):
+    """Returns (seconds, peak traced MB) for one call of `solve`."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    solve()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2 ** 20
+
+
+def bench_nodes(args):
+    """
+    Compares Maze.solve with the slotted Node against a Node with a
+    per-instance __dict__ on a large generated maze.
+    """
+    size = int(args[0]) if len(args) > 0 else 500
+    m = load_generated(size, size)
+
+    print(f"{'node':<10}{'explored':>10}{'solve s':>10}{'peak MB':>10}")
+    for name, node_class in [("dict", DictNode), ("slots", maze.Node)]:
+        maze.Node = node_class
+        try:
+            elapsed, peak = measure(m.solve)
+        finally:
+            maze.Node = BENCHMARK_NODE
+        print(f"{name:<10}{m.num_explored:>10}{elapsed:>10.3f}{peak:>10.1f}")
+
+
+def bench_informed(args):
+    """
+    Compares explored cells, solve time and path length of BFS, A*
+    and greedy best-first search on open generated mazes of each size.
+    """
+    sizes = [int(arg) for arg in args] or [50, 100, 200, 400]
+
+    print(f"{'size':<8}{'method':<10}{'explored':>10}{'solve s':>10}{'path':>8}")
+    for size in sizes:
+        m = load_generated(size, size, density=0.2)
+        lengths = {}
+        for method in ["bfs", "astar", "greedy"]:
+            start = time.perf_counter()
+            m.solve(method)
+            elapsed = time.perf_counter() - start
+            lengths[method] = len(m.solution[0])
+            print(f"{size:<8}{method:<10}{m.num_explored:>10}{elapsed:>10.3f}{lengths[method]:>8}")
+        if lengths["astar"] != lengths["bfs"]:
+            sys.exit("A* path is longer than the BFS path.")
+
+
+def bench_wavefront(args):
+    """
+    Compares per-cell BFS with the vectorized wavefront BFS on generated
+    mazes of each size, checking that both find the same solution.
+    """
+    sizes = [int(arg) for arg in args] or [100, 250, 500, 1000]
+
+    print(f"{'size':<8}{'bfs s':>10}{'wavefront s':>14}{'speedup':>10}{'path':>8}")
+    for size in sizes:
+        m = load_generated(size, size, density=0.2)
+
+        start = time.perf_counter()
+        m.solve("bfs")
+        per_cell = time.perf_counter() - start
+        expected = (m.solution, m.num_explored)
+
+        start = time.perf_counter()
+        m.solve("wavefront")
+        vectorized = time.perf_counter() - start
+        if (m.solution, m.num_explored) != expected:
+            sys.exit("Wavefront solution differs from BFS.")
+
+        print(f"{size:<8}{per_cell:>10.3f}{vectorized:>14.3f}"
+              f"{per_cell / vectorized:>10.1f}{len(m.solution[0]):>8}")
+
+
+def bench_stream(args):
+    """
+    Compares load time and peak traced memory of Maze() and
+    Maze.stream() on a generated maze file.
+    """
+    size = int(args[0]) if len(args) > 0 else 2000
+
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        f.write(generate(size, size))
+    try:
+        print(f"{'loader':<8}{'cells':>12}{'load s':>10}{'peak MB':>10}{'bits / cell':>13}")
+        for name, load in [("lists", maze.Maze), ("stream", maze.Maze.stream)]:
+            elapsed, peak = measure(lambda: load(f.name))
+            print(f"{name:<8}{size * size:>12}{elapsed:>10.3f}{peak:>10.1f}"
+                  f"{peak * 2 ** 23 / (size * size):>13.2f}")
+    finally:
+        os.remove(f.name)
+
+
+def bench_jps(args):
+    """
+    Compares BFS, A* and jump point search on open-room mazes:
+    expansions, solve time and path length.
+    """
+    sizes = [int(arg) for arg in args] or [100, 200, 400]
+
+    print(f"{'size':<8}{'method':<8}{'explored':>10}{'solve s':>10}{'path':>8}")
+    for size in sizes:
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write(generate_rooms(size, size))
+        try:
+            m = maze.Maze(f.name)
+        finally:
+            os.remove(f.name)
+
+        lengths = {}
+        for method in ["bfs", "astar", "jps"]:
+            start = time.perf_counter()
+            m.solve(method)
+            elapsed = time.perf_counter() - start
+            lengths[method] = len(m.solution[0])
+            print(f"{size:<8}{method:<8}{m.num_explored:>10}{elapsed:>10.3f}{lengths[method]:>8}")
+        if lengths["jps"] != lengths["bfs"]:
+            sys.exit("Jump point search path is not the shortest.")
+
+
+def bench_render(args):
+    """
+    Compares per-cell ImageDraw rendering with the NumPy renderer on
+    solved generated mazes, with explored cells shown.
+    """
+    sizes = [int(arg) for arg in args] or [50, 100, 200]
+
+    print(f"{'size':<8}{'cells s':>10}{'array s':>10}{'speedup':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            m = load_generated(size, size)
+            m.solve()
+            timings = []
+            for render in [m.draw_cells, m.render_array]:
+                start = time.perf_counter()
+                render(os.path.join(directory, "maze.png"), show_explored=True, cell_size=2, cell_border=0)
+                timings.append(time.perf_counter() - start)
+            print(f"{size:<8}{timings[0]:>10.3f}{timings[1]:>10.3f}{timings[0] / timings[1]:>10.1f}")
+
+
+def bench_field(args):
+    """
+    Compares answering many goal queries with one BFS each against
+    answering them from the cached distance field.
+    """
+    size = int(args[0]) if len(args) > 0 else 200
+    count = int(args[1]) if len(args) > 1 else 50
+
+    m = load_generated(size, size)
+    rng = random.Random(0)
+    cells = [(i, j) for i in range(size) for j in range(size) if not m.walls[i][j]]
+    goals = rng.sample(cells, count)
+
+    start = time.perf_counter()
+    searched = []
+    for goal in goals:
+        m.goal = goal
+        try:
+            m.solve()
+            searched.append(m.solution)
+        except Exception:
+            searched.append(None)
+    per_query = time.perf_counter() - start
+
+    start = time.perf_counter()
+    m.field = None
+    field = m.distance_field()
+    built = time.perf_counter() - start
+    cached = [field.path_to(goal) for goal in goals]
+    answered = time.perf_counter() - start - built
+
+    if cached != searched:
+        sys.exit("Distance field paths differ from BFS.")
+    print(f"{count} queries on {size}x{size}")
+    print(f"  BFS per query:   {per_query:.3f}s")
+    print(f"  Distance field:  {built:.3f}s to build, {answered * 1e3:.3f}ms for all queries")
+
+
+# The Node class maze.py ships with, restored after each run
+BENCHMARK_NODE = maze.Node
+
+BENCHMARKS = {
+    "nodes": bench_nodes,
+    "informed": bench_informed,
+    "wavefront": bench_wavefront,
+    "stream": bench_stream,
+    "jps": bench_jps,
+    "render": bench_render,
+    "field": bench_field,
+}
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        sys.exit(f"Usage: python benchmark.py [{'|'.join(BENCHMARKS)}] ...")
+    BENCHMARKS[sys.argv[1]](sys.argv[2:])
+
+
+if __name__ == "__main__":
+    main()
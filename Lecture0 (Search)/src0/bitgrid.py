@@ -0,0 +1,111 @@
+"""
+Packed one-bit-per-cell wall grids, loaded by streaming a maze file.
+
+Row `i` occupies bytes `i * row_bytes` to `(i + 1) * row_bytes` of
+`data`, with column `j` in bit `7 - j % 8` of byte `j // 8`, the same
+layout as numpy.packbits.
+"""
+
+# Maps every byte of a maze line to "1" (wall) or "0" (open)
+WALL_BITS = bytes(ord("0") if c in b" AB" else ord("1") for c in range(256))
+
+
+class BitGrid():
+
+    def __init__(self, height, width, data=None):
+        self.height = height
+        self.width = width
+        self.row_bytes = (width + 7) // 8
+        self.data = data if data is not None else bytearray(height * self.row_bytes)
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, row):
+        if not 0 <= row < self.height:
+            raise IndexError("row out of range")
+        return BitRow(self, row)
+
+    def __iter__(self):
+        for row in range(self.height):
+            yield BitRow(self, row)
+
+    def __array__(self, dtype=None, copy=None):
+        """Unpacks the grid into a (height, width) NumPy boolean array."""
+        import numpy as np
+        bits = np.unpackbits(
+            np.frombuffer(self.data, dtype=np.uint8).reshape(self.height, self.row_bytes),
+            axis=1, count=self.width
+        ).astype(bool)
+        return bits if dtype is None else bits.astype(dtype)
+
+    def is_wall(self, row, col):
+        return bool(self.data[row * self.row_bytes + col // 8] >> (7 - col % 8) & 1)
+
+
+class BitRow():
+    """One row of a BitGrid, indexable like a list of bools."""
+
+    def __init__(self, grid, row):
+        self.grid = grid
+        self.row = row
+
+    def __len__(self):
+        return self.grid.width
+
+    def __getitem__(self, col):
+        if not 0 <= col < self.grid.width:
+            raise IndexError("column out of range")
+        return self.grid.is_wall(self.row, col)
+
+    def __iter__(self):
+        for col in range(self.grid.width):
+            yield self.grid.is_wall(self.row, col)
+
+
+def load(filename):
+    """
+    Streams a maze file line by line into a BitGrid.
+    Returns the grid with the start and goal cells.
+
+    A first pass measures the maze and finds "A" and "B"; a second packs
+    each line into its preallocated row, so memory stays at one bit per
+    cell plus a single line.
+    """
+    height = 0
+    width = 0
+    start = None
+    goal = None
+    with open(filename) as f:
+        for i, line in enumerate(f):
+            line = line.rstrip("\r\n")
+            height += 1
+            width = max(width, len(line))
+            if "A" in line:
+                if start is not None or line.count("A") > 1:
+                    raise Exception("maze must have exactly one start point")
+                start = (i, line.index("A"))
+            if "B" in line:
+                if goal is not None or line.count("B") > 1:
+                    raise Exception("maze must have exactly one goal")
+                goal = (i, line.index("B"))
+
+    if start is None:
+        raise Exception("maze must have exactly one start point")
+    if goal is None:
+        raise Exception("maze must have exactly one goal")
+
+    grid = BitGrid(height, width)
+    row_bits = grid.row_bytes * 8
+    with open(filename) as f:
+        for i, line in enumerate(f):
+            line = line.rstrip("\r\n")
+            if not line:
+                continue
+
+            # Non-ASCII characters become "?", which counts as a wall
+            bits = line.encode("ascii", "replace").translate(WALL_BITS)
+            row = int(bits.ljust(row_bits, b"0"), 2).to_bytes(grid.row_bytes, "big")
+            grid.data[i * grid.row_bytes:(i + 1) * grid.row_bytes] = row
+
+    return grid, start, goal
@@ -1,7 +1,13 @@
 # -*- coding: utf-8 -*-
+import heapq
+import itertools
+import os
 import sys
+from collections import deque
 
 class Node():
+    __slots__ = ("state", "parent", "action")
+
     def __init__(self, state, parent, action):
         self.state = state
         self.parent = parent
@@ -10,13 +16,17 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+
+        # Maps each state in the frontier to how many nodes hold it
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -25,10 +35,18 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.discard(node.state)
             return node
 
+    def discard(self, state):
+        """Drops one occurrence of state from the membership index."""
+        count = self.states[state] - 1
+        if count:
+            self.states[state] = count
+        else:
+            del self.states[state]
+
 
 class QueueFrontier(StackFrontier):
 
@@ -36,13 +54,114 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.discard(node.state)
+            return node
+
+class HeapFrontier(StackFrontier):
+    """Frontier that always removes the node added with the lowest priority."""
+
+    def __init__(self):
+        super().__init__()
+        self.frontier = []
+
+        # Breaks ties between equal priorities in insertion order
+        self.counter = itertools.count()
+
+    def add(self, node, priority):
+        heapq.heappush(self.frontier, (priority, next(self.counter), node))
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = heapq.heappop(self.frontier)[2]
+            self.discard(node.state)
             return node
 
+
+class DistanceField():
+    """
+    Breadth-first distances and parent moves from a maze's start to
+    every reachable cell, so that any number of goal queries can be
+    answered without searching again.
+    """
+
+    def __init__(self, maze):
+        self.start = maze.start
+
+        # Maps each reached cell to (action, previous cell), in the same
+        # first-discovery order as Maze.solve, so paths match it exactly
+        self.parents = {maze.start: None}
+        self.distances = {maze.start: 0}
+
+        queue = deque([maze.start])
+        while queue:
+            state = queue.popleft()
+            distance = self.distances[state] + 1
+            for action, neighbor in maze.neighbors(state):
+                if neighbor not in self.parents:
+                    self.parents[neighbor] = (action, state)
+                    self.distances[neighbor] = distance
+                    queue.append(neighbor)
+
+    def distance_to(self, goal):
+        """Returns the number of moves from the start to goal, or None if unreachable."""
+        return self.distances.get(goal)
+
+    def path_to(self, goal):
+        """
+        Returns the (actions, cells) solution from the start to goal,
+        or None if it is unreachable.
+        """
+        if goal not in self.parents:
+            return None
+        actions = []
+        cells = []
+        while self.parents[goal] is not None:
+            action, previous = self.parents[goal]
+            actions.append(action)
+            cells.append(goal)
+            goal = previous
+        actions.reverse()
+        cells.reverse()
+        return actions, cells
+
+    def nearest(self, goals):
+        """
+        Returns the reachable goal closest to the start (the first listed
+        among equals), or None if none is reachable.
+        """
+        reachable = [goal for goal in goals if goal in self.distances]
+        if not reachable:
+            return None
+        return min(reachable, key=self.distances.get)
+
+
+# Fill colour of each kind of cell in output images
+COLORS = {
+    "wall": (40, 40, 40),
+    "start": (255, 0, 0),
+    "goal": (0, 171, 28),
+    "solution": (220, 235, 113),
+    "explored": (212, 97, 85),
+    "empty": (237, 240, 252)
+}
+
+
+def manhattan(state, goal):
+    """Returns the Manhattan distance between two cells."""
+    return abs(state[0] - goal[0]) + abs(state[1] - goal[1])
+
+
 class Maze():
 
-    def __init__(self, filename):
+    def __init__(self, filename, multiple_goals=False):
+        """
+        Loads a maze file. With `multiple_goals`, any number of "B" cells
+        are accepted and listed in `goals`; `goal` is the first of them.
+        """
 
         # Read file and set height and width of maze
         with open(filename) as f:
@@ -51,7 +170,9 @@ class Maze():
         # Validate start and goal
         if contents.count("A") != 1:
             raise Exception("maze must have exactly one start point")
-        if contents.count("B") != 1:
+        if multiple_goals and contents.count("B") == 0:
+            raise Exception("maze must have at least one goal")
+        if not multiple_goals and contents.count("B") != 1:
             raise Exception("maze must have exactly one goal")
 
         # Determine height and width of maze
@@ -61,6 +182,7 @@ class Maze():
 
         # Keep track of walls
         self.walls = []
+        self.goals = []
         for i in range(self.height):
             row = []
             for j in range(self.width):
@@ -69,7 +191,7 @@ class Maze():
                         self.start = (i, j)
                         row.append(False)
                     elif contents[i][j] == "B":
-                        self.goal = (i, j)
+                        self.goals.append((i, j))
                         row.append(False)
                     elif contents[i][j] == " ":
                         row.append(False)
@@ -79,7 +201,27 @@ class Maze():
                     row.append(False)
             self.walls.append(row)
 
+        self.goal = self.goals[0]
         self.solution = None
+        self.field = None
+
+
+    @classmethod
+    def stream(cls, filename):
+        """
+        Loads a maze with its walls packed one bit per cell in a BitGrid,
+        for files too large to hold as lists of bools.
+        """
+        import bitgrid
+
+        maze = cls.__new__(cls)
+        maze.walls, maze.start, maze.goal = bitgrid.load(filename)
+        maze.goals = [maze.goal]
+        maze.height = maze.walls.height
+        maze.width = maze.walls.width
+        maze.solution = None
+        maze.field = None
+        return maze
 
 
     def Print(self):
@@ -91,7 +233,7 @@ class Maze():
                     print("█", end="")
                 elif (i, j) == self.start:
                     print("A", end="")
-                elif (i, j) == self.goal:
+                elif (i, j) in self.goals:
                     print("B", end="")
                 elif solution is not None and (i, j) in solution:
                     print("*", end="")
@@ -117,15 +259,35 @@ class Maze():
         return result
 
 
-    def solve(self):
-        """Finds a solution to maze, if one exists."""
+    def solve(self, method="bfs", heuristic=manhattan):
+        """
+        Finds a solution to maze, if one exists, using one of SOLVERS:
+        breadth-first, depth-first, A*, greedy best-first, vectorized
+        breadth-first or jump point search, or "nearest" for the
+        breadth-first path to the closest of several goals.
+        The informed searches estimate distance with heuristic(state, goal).
+        Raises ValueError for any other method.
+        """
+        if method not in SOLVERS:
+            raise ValueError(f"unknown solver {method!r}, expected one of {', '.join(SOLVERS)}")
+        if method in ["astar", "greedy"]:
+            return self.solve_informed(heuristic, greedy=(method == "greedy"))
+        if method == "wavefront":
+            return self.solve_wavefront()
+        if method == "jps":
+            return self.solve_jps(heuristic)
+        if method == "nearest":
+            return self.solve_nearest()
 
         # Keep track of number of states explored
         self.num_explored = 0
 
         # Initialize frontier to just the starting position
         start = Node(state=self.start, parent=None, action=None)
-        frontier = QueueFrontier()
+        if method == "dfs":
+            frontier = StackFrontier()
+        elif method == "bfs":
+            frontier = QueueFrontier()
         frontier.add(start)
 
         # Initialize an empty explored set
@@ -165,10 +327,249 @@ class Maze():
                     frontier.add(child)
 
 
-    def output_image(self, filename, show_solution=True, show_explored=False):
+    def solve_informed(self, heuristic, greedy=False):
+        """
+        Finds a solution with A*, or with greedy best-first search,
+        expanding cells in order of heuristic(state, goal) plus, for A*,
+        the number of steps taken to reach them.
+        """
+
+        # Keep track of number of states explored
+        self.num_explored = 0
+
+        # Cheapest known number of steps to each cell
+        cost = {self.start: 0}
+
+        # Initialize frontier to just the starting position
+        start = Node(state=self.start, parent=None, action=None)
+        frontier = HeapFrontier()
+        estimate = heuristic(self.start, self.goal)
+        frontier.add(start, (estimate, estimate))
+
+        # Initialize an empty explored set
+        self.explored = set()
+
+        # Keep looping until solution found
+        while True:
+
+            # If nothing left in frontier, then no path
+            if frontier.empty():
+                raise Exception("no solution")
+
+            # Choose the most promising node, skipping superseded entries
+            node = frontier.remove()
+            if node.state in self.explored:
+                continue
+            self.num_explored += 1
+
+            # If node is the goal, then we have a solution
+            if node.state == self.goal:
+                actions = []
+                cells = []
+                while node.parent is not None:
+                    actions.append(node.action)
+                    cells.append(node.state)
+                    node = node.parent
+                actions.reverse()
+                cells.reverse()
+                self.solution = (actions, cells)
+                return
+
+            # Mark node as explored
+            self.explored.add(node.state)
+
+            # Add neighbors reached more cheaply than before to frontier,
+            # preferring those estimated closer to the goal among equals
+            steps = cost[node.state] + 1
+            for action, state in self.neighbors(node.state):
+                if state in self.explored or steps >= cost.get(state, steps + 1):
+                    continue
+                cost[state] = steps
+                estimate = heuristic(state, self.goal)
+                child = Node(state=state, parent=node, action=action)
+                frontier.add(child, (estimate if greedy else steps + estimate, estimate))
+
+
+    def is_open(self, row, col):
+        """Returns True if (row, col) is inside the maze and not a wall."""
+        return 0 <= row < self.height and 0 <= col < self.width and not self.walls[row][col]
+
+
+    def jump(self, state, direction):
+        """
+        Moves from state in direction (a (row, col) step) until reaching the
+        goal, a jump point or a wall. Returns the cell reached, or None.
+
+        Moving horizontally, a cell is a jump point when a wall beside the
+        previous cell ends, opening a side passage. Moving vertically, it is
+        a jump point when the same happens or when a horizontal jump from it
+        finds one.
+        """
+        row, col = state
+        dr, dc = direction
+        while True:
+            row += dr
+            col += dc
+            if not self.is_open(row, col):
+                return None
+            if (row, col) == self.goal:
+                return (row, col)
+
+            if dc != 0:
+                for side in [-1, 1]:
+                    if self.is_open(row + side, col) and not self.is_open(row + side, col - dc):
+                        return (row, col)
+            else:
+                for side in [-1, 1]:
+                    if self.is_open(row, col + side) and not self.is_open(row - dr, col + side):
+                        return (row, col)
+                for side in [-1, 1]:
+                    if self.jump((row, col), (0, side)) is not None:
+                        return (row, col)
+
+
+    def solve_jps(self, heuristic=manhattan):
+        """
+        Finds a shortest solution with jump point search: A* over jump
+        points only, skipping the symmetric cells of open regions.
+        The path between jump points is a straight line, which is filled
+        in cell by cell so the solution has the same format as solve().
+        """
+        moves = {(-1, 0): "up", (1, 0): "down", (0, -1): "left", (0, 1): "right"}
+
+        # Keep track of number of jump points explored
+        self.num_explored = 0
+
+        cost = {self.start: 0}
+        start = Node(state=self.start, parent=None, action=None)
+        frontier = HeapFrontier()
+        estimate = heuristic(self.start, self.goal)
+        frontier.add(start, (estimate, estimate))
+        self.explored = set()
+
+        while True:
+            if frontier.empty():
+                raise Exception("no solution")
+
+            node = frontier.remove()
+            if node.state in self.explored:
+                continue
+            self.num_explored += 1
+
+            # Fill in the straight runs between jump points
+            if node.state == self.goal:
+                actions = []
+                cells = []
+                while node.parent is not None:
+                    (row, col), (dr, dc) = node.state, node.action
+                    while (row, col) != node.parent.state:
+                        actions.append(moves[(dr, dc)])
+                        cells.append((row, col))
+                        row -= dr
+                        col -= dc
+                    node = node.parent
+                actions.reverse()
+                cells.reverse()
+                self.solution = (actions, cells)
+                return
+
+            self.explored.add(node.state)
+
+            # Prune to the directions a shortest path could continue in
+            if node.action is None:
+                directions = list(moves)
+            elif node.action[1] != 0:
+                directions = [(-1, 0), (1, 0), node.action]
+            else:
+                directions = [(0, -1), (0, 1), node.action]
+
+            row, col = node.state
+            for direction in directions:
+                state = self.jump(node.state, direction)
+                if state is None or state in self.explored:
+                    continue
+                steps = cost[node.state] + abs(state[0] - row) + abs(state[1] - col)
+                if steps >= cost.get(state, steps + 1):
+                    continue
+                cost[state] = steps
+                estimate = heuristic(state, self.goal)
+                child = Node(state=state, parent=node, action=direction)
+                frontier.add(child, (steps + estimate, estimate))
+
+
+    def distance_field(self):
+        """
+        Returns the DistanceField from the start, computing it on first use.
+        """
+        if self.field is None:
+            self.field = DistanceField(self)
+        return self.field
+
+
+    def solve_to(self, goal):
+        """
+        Finds the breadth-first solution from the start to any open cell,
+        reusing the cached distance field so each query costs only the
+        length of its path.
+        """
+        field = self.distance_field()
+        self.solution = field.path_to(goal)
+        if self.solution is None:
+            raise Exception("no solution")
+        self.num_explored = len(field.parents)
+        self.explored = field.parents.keys()
+
+
+    def solve_nearest(self):
+        """
+        Finds the breadth-first solution to whichever goal is closest
+        to the start and returns that goal.
+        """
+        goal = self.distance_field().nearest(self.goals)
+        if goal is None:
+            raise Exception("no solution")
+        self.solve_to(goal)
+        return goal
+
+
+    def wall_array(self):
+        """Returns the walls as a NumPy boolean array."""
+        import numpy as np
+        return np.array(self.walls, dtype=bool)
+
+
+    def solve_wavefront(self):
+        """
+        Finds the same solution as breadth-first search, expanding a
+        whole BFS level at a time with NumPy (see wavefront.py).
+        """
+        import wavefront
+
+        self.solution, explored = wavefront.solve(self.wall_array(), self.start, self.goal)
+        rows, cols = explored.nonzero()
+        self.explored = set(zip(rows.tolist(), cols.tolist()))
+        self.num_explored = len(self.explored) + 1
+
+
+    def output_image(self, filename, show_solution=True, show_explored=False,
+                     cell_size=50, cell_border=2):
+        """
+        Saves a picture of the maze, drawing it with NumPy when available
+        and one rectangle per cell otherwise.
+        """
+        try:
+            import numpy
+        except ImportError:
+            return self.draw_cells(filename, show_solution, show_explored,
+                                   cell_size, cell_border)
+        return self.render_array(filename, show_solution, show_explored,
+                                 cell_size, cell_border)
+
+
+    def draw_cells(self, filename, show_solution=True, show_explored=False,
+                   cell_size=50, cell_border=2):
+        """Saves a picture of the maze, drawing each cell with ImageDraw."""
         from PIL import Image, ImageDraw
-        cell_size = 50
-        cell_border = 2
 
         # Create a blank canvas
         img = Image.new(
@@ -178,33 +579,33 @@ class Maze():
         )
         draw = ImageDraw.Draw(img)
 
-        solution = self.solution[1] if self.solution is not None else None
+        solution = set(self.solution[1]) if self.solution is not None else None
         for i, row in enumerate(self.walls):
             for j, col in enumerate(row):
 
                 # Walls
                 if col:
-                    fill = (40, 40, 40)
+                    fill = COLORS["wall"]
 
                 # Start
                 elif (i, j) == self.start:
-                    fill = (255, 0, 0)
+                    fill = COLORS["start"]
 
                 # Goal
-                elif (i, j) == self.goal:
-                    fill = (0, 171, 28)
+                elif (i, j) in self.goals:
+                    fill = COLORS["goal"]
 
                 # Solution
                 elif solution is not None and show_solution and (i, j) in solution:
-                    fill = (220, 235, 113)
+                    fill = COLORS["solution"]
 
                 # Explored
                 elif solution is not None and show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
+                    fill = COLORS["explored"]
 
                 # Empty cell
                 else:
-                    fill = (237, 240, 252)
+                    fill = COLORS["empty"]
 
                 # Draw cell
                 draw.rectangle(
@@ -216,15 +617,79 @@ class Maze():
         img.save(filename)
 
 
-if len(sys.argv) != 2:
-    sys.exit("Usage: python maze.py maze.txt")
-
-m = Maze(sys.argv[1])
-print("Maze:")
-m.Print()
-print("Solving...")
-m.solve()
-print("States Explored:", m.num_explored)
-print("Solution:")
-m.Print()
-m.output_image("maze3_queue.png", show_explored=True)
+    def render_array(self, filename, show_solution=True, show_explored=False,
+                     cell_size=50, cell_border=2):
+        """
+        Saves the same picture as draw_cells, built as one RGBA pixel per
+        cell from masks and then scaled up to full size in one step.
+        """
+        import numpy as np
+        from PIL import Image
+
+        names = ["empty", "explored", "solution", "goal", "start", "wall"]
+        palette = np.array([COLORS[name] + (255,) for name in names], dtype=np.uint8)
+
+        # Paint each layer over the ones below it
+        labels = np.zeros((self.height, self.width), dtype=np.uint8)
+        if self.solution is not None:
+            if show_explored and self.explored:
+                rows, cols = np.fromiter(
+                    itertools.chain.from_iterable(self.explored),
+                    dtype=np.intp, count=2 * len(self.explored)
+                ).reshape(-1, 2).T
+                labels[rows, cols] = names.index("explored")
+            if show_solution and self.solution[1]:
+                rows, cols = np.array(self.solution[1]).T
+                labels[rows, cols] = names.index("solution")
+        for goal in self.goals:
+            labels[goal] = names.index("goal")
+        labels[self.start] = names.index("start")
+        labels[self.wall_array()] = names.index("wall")
+        cells = palette[labels]
+
+        # Pixels inside each cell's border take the cell's colour, the rest stay black
+        inside = np.zeros(cell_size, dtype=bool)
+        inside[cell_border:cell_size - cell_border + 1] = True
+        black = np.array([0, 0, 0, 255], dtype=np.uint8)
+        pixels = np.where(
+            (inside[:, None] & inside[None, :])[None, :, None, :, None],
+            cells[:, None, :, None, :],
+            black
+        ).reshape(self.height * cell_size, self.width * cell_size, 4)
+
+        Image.fromarray(pixels, "RGBA").save(filename)
+
+
+# Search methods accepted by Maze.solve
+SOLVERS = ["bfs", "dfs", "astar", "greedy", "wavefront", "jps", "nearest"]
+
+
+def main():
+    if len(sys.argv) not in [2, 3] or (len(sys.argv) == 3 and sys.argv[2] not in SOLVERS):
+        sys.exit(f"Usage: python maze.py maze.txt [{'|'.join(SOLVERS)}]")
+    method = sys.argv[2] if len(sys.argv) == 3 else "bfs"
+
+    m = Maze(sys.argv[1], multiple_goals=(method == "nearest"))
+    print("Maze:")
+    m.Print()
+    print("Solving...")
+    goal = m.solve(method)
+    if goal is not None:
+        print("Nearest Goal:", goal)
+    print("States Explored:", m.num_explored)
+    print("Solution:")
+    m.Print()
+    m.output_image(image_filename(sys.argv[1], method), show_explored=True)
+
+
+def image_filename(filename, method):
+    """
+    Returns where to save the picture of a solved maze file, named like
+    the examples: maze1_queue.png for BFS, maze1_stack.png for DFS.
+    """
+    suffix = {"bfs": "queue", "dfs": "stack"}.get(method, method)
+    return f"{os.path.splitext(filename)[0]}_{suffix}.png"
+
+
+if __name__ == "__main__":
+    main()
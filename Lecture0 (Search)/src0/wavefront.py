@@ -0,0 +1,108 @@
+"""
+Vectorized breadth-first search over a NumPy wall bitmap.
+
+Each BFS level is expanded in one step: the whole frontier is shifted
+by the four move offsets at once, and cells that are walls or already
+reached are masked out. Cells get the rank they would have in the
+FIFO queue of Maze.solve, so the parent chosen for every cell, and
+therefore the solution path, matches the per-cell solver exactly.
+"""
+
+import numpy as np
+
+# Moves in the order Maze.neighbors yields them
+ACTIONS = ["up", "down", "left", "right"]
+
+
+def distances(walls, start, goal=None):
+    """
+    Runs BFS from `start` over a boolean `walls` array, stopping after the
+    level that reaches `goal` if one is given.
+
+    Returns three arrays shaped like `walls`: the distance of every cell
+    from the start (-1 if not reached), the index into ACTIONS of the
+    move that first reached it (-1 for the start and unreached cells),
+    and its position within its BFS level in dequeue order.
+    """
+    height, width = walls.shape
+
+    # Surround the grid with walls so moves never need bounds checks
+    stride = width + 2
+    passable = np.zeros((height + 2, stride), dtype=bool)
+    passable[1:-1, 1:-1] = ~walls
+    passable = passable.ravel()
+
+    distance = np.full(passable.size, -1, dtype=np.int32)
+    parent = np.full(passable.size, -1, dtype=np.int8)
+    rank = np.zeros(passable.size, dtype=np.int64)
+
+    offsets = np.array([-stride, stride, -1, 1])
+    moves = np.arange(len(offsets))
+    target = None if goal is None else (goal[0] + 1) * stride + goal[1] + 1
+
+    level = np.array([(start[0] + 1) * stride + start[1] + 1])
+    distance[level] = 0
+    depth = 0
+    while level.size and (target is None or distance[target] == -1):
+        depth += 1
+
+        # Every neighbour of every frontier cell, keyed by the order in
+        # which the FIFO solver would discover it: its parent's rank, then the move
+        cells = (level[None, :] + offsets[:, None]).ravel()
+        keys = (np.arange(level.size)[None, :] * len(offsets) + moves[:, None]).ravel()
+        fresh = passable[cells] & (distance[cells] == -1)
+        cells = cells[fresh]
+        keys = keys[fresh]
+
+        # Keep each cell's earliest discovery, in discovery order
+        order = np.argsort(keys, kind="stable")
+        cells = cells[order]
+        keys = keys[order]
+        first = np.unique(cells, return_index=True)[1]
+        first.sort()
+
+        level = cells[first]
+        distance[level] = depth
+        parent[level] = keys[first] % len(offsets)
+        rank[level] = np.arange(level.size)
+
+    def unpad(array):
+        return array.reshape(height + 2, stride)[1:-1, 1:-1]
+
+    return unpad(distance), unpad(parent), unpad(rank)
+
+
+def path(parent, goal):
+    """
+    Walks the parent moves back from `goal` to the start.
+    Returns (actions, cells) in the format of Maze.solution.
+    """
+    steps = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+    actions = []
+    cells = []
+    row, col = goal
+    while parent[row, col] != -1:
+        move = parent[row, col]
+        actions.append(ACTIONS[move])
+        cells.append((row, col))
+        row -= steps[move][0]
+        col -= steps[move][1]
+    actions.reverse()
+    cells.reverse()
+    return actions, cells
+
+
+def solve(walls, start, goal):
+    """
+    Returns the (actions, cells) solution from `start` to `goal` and a
+    boolean array of the cells the FIFO solver would have explored
+    before dequeuing the goal.
+    """
+    distance, parent, rank = distances(walls, start, goal)
+    depth = distance[goal]
+    if depth == -1:
+        raise Exception("no solution")
+
+    explored = ((distance >= 0) & (distance < depth)) | \
+        ((distance == depth) & (rank < rank[goal]))
+    return path(parent, goal), explored
@@ -0,0 +1,278 @@
+"""
+Benchmarks for the Tic-Tac-Toe AI.
+
+Usage: python benchmark.py table
+       python benchmark.py book
+       python benchmark.py mnk [seconds] [m,n,k ...]
+       python benchmark.py profile [depth]
+       python benchmark.py parallel [depth] [m,n,k]
+"""
+
+import cProfile
+import multiprocessing
+import pstats
+import sys
+import time
+
+import bitboard
+import book
+import engine
+import tictactoe as ttt
+
+
+def plain_minimax(board):
+    """
+    Alpha-beta minimax without a transposition table, kept as a baseline.
+    Returns the chosen action and the number of positions searched.
+    """
+    nodes = 0
+
+    def value(board, alpha, beta, maximizing):
+        nonlocal nodes
+        nodes += 1
+        if ttt.terminal(board):
+            return ttt.utility(board)
+        best = -2 if maximizing else 2
+        for act in ttt.actions(board):
+            v = value(ttt.result(board, act), alpha, beta, not maximizing)
+            if maximizing:
+                best = max(best, v)
+                alpha = max(alpha, best)
+            else:
+                best = min(best, v)
+                beta = min(beta, best)
+            if alpha >= beta:
+                break
+        return best
+
+    maximizing = ttt.player(board) == ttt.X
+    best_action = None
+    best = None
+    for act in ttt.actions(board):
+        v = value(ttt.result(board, act), -1, 1, not maximizing)
+        if best is None or (v > best if maximizing else v < best):
+            best, best_action = v, act
+    return best_action, nodes
+
+
+def self_play(choose):
+    """
+    Plays one game with `choose` picking every move from the empty board.
+    Returns a list of (action, nodes, seconds) for each move.
+    """
+    board = ttt.initial_state()
+    moves = []
+    while not ttt.terminal(board):
+        start = time.perf_counter()
+        action, nodes = choose(board)
+        moves.append((action, nodes, time.perf_counter() - start))
+        board = ttt.result(board, action)
+    return moves
+
+
+def bench_table(args):
+    """
+    Compares plain alpha-beta with the transposition table, both cleared
+    before every move and kept for the whole game, over one self-play game.
+    """
+    # Search every move rather than look it up
+    book.table = b""
+
+    def cold(board):
+        bitboard.game().transpositions.clear()
+        return ttt.minimax(board), bitboard.nodes_visited
+
+    def warm(board):
+        return ttt.minimax(board), bitboard.nodes_visited
+
+    bitboard.game().transpositions.clear()
+    games = {
+        "plain": self_play(plain_minimax),
+        "cold": self_play(cold),
+    }
+    bitboard.game().transpositions.clear()
+    games["warm"] = self_play(warm)
+
+    actions = [[action for action, _, _ in moves] for moves in games.values()]
+    if any(moves != actions[0] for moves in actions):
+        sys.exit("Engines chose different moves.")
+
+    print(f"{'move':<6}" + "".join(f"{name + ' nodes':>13}{name + ' ms':>10}" for name in games))
+    for i in range(len(actions[0])):
+        row = "".join(f"{moves[i][1]:>13}{moves[i][2] * 1e3:>10.2f}" for moves in games.values())
+        print(f"{i + 1:<6}{row}")
+    totals = "".join(
+        f"{sum(m[1] for m in moves):>13}{sum(m[2] for m in moves) * 1e3:>10.2f}"
+        for moves in games.values()
+    )
+    print(f"{'total':<6}{totals}")
+
+
+def reachable():
+    """
+    Returns every non-terminal board reachable from the initial state.
+    """
+    boards = {}
+    frontier = [ttt.initial_state()]
+    while frontier:
+        board = frontier.pop()
+        code = book.index(board)
+        if code in boards or ttt.terminal(board):
+            continue
+        boards[code] = board
+        for action in ttt.actions(board):
+            frontier.append(ttt.result(board, action))
+    return list(boards.values())
+
+
+def bench_book(args):
+    """
+    Compares answering every reachable position with the exact search,
+    from an empty and from a warm transposition table, against looking
+    it up in the solved-position table.
+    """
+    boards = reachable()
+    if book.load() is None:
+        book.save(book.solve())
+
+    timings = {}
+    answers = {}
+    for name in ["cold search", "warm search", "book"]:
+        book.table = None if name == "book" else b""
+        if name == "cold search":
+            bitboard.game().transpositions.clear()
+        start = time.perf_counter()
+        answers[name] = [ttt.minimax(board) for board in boards]
+        timings[name] = time.perf_counter() - start
+
+    if len(set(map(tuple, answers.values()))) != 1:
+        sys.exit("Book moves differ from the search.")
+    print(f"{len(boards)} positions")
+    for name, elapsed in timings.items():
+        print(f"  {name:<12}{elapsed * 1e3:>10.2f}ms total{elapsed / len(boards) * 1e6:>10.2f}us per move")
+
+
+def bench_mnk(args):
+    """
+    Plays one self-play game per m,n,k board with the iterative-deepening
+    search under a per-move time limit, and reports the depth reached and
+    node throughput of each move.
+    """
+    seconds = float(args[0]) if len(args) > 0 else 1.0
+    boards = [tuple(int(v) for v in arg.split(",")) for arg in args[1:]] or [(3, 3, 3), (4, 4, 4), (5, 5, 4)]
+
+    print(f"{'board':<8}{'moves':>6}{'depth':>8}{'nodes':>10}{'seconds':>10}{'nodes/s':>10}  result")
+    for m, n, k in boards:
+        game = bitboard.game(m, n, k)
+        x = o = 0
+        depths = []
+        nodes = 0
+        start = time.perf_counter()
+        while not game.over(x, o):
+            move, _, depth, searched = engine.search(game, x, o, time_limit=seconds)
+            depths.append(depth)
+            nodes += searched
+            if game.x_to_move(x, o):
+                x |= move
+            else:
+                o |= move
+        elapsed = time.perf_counter() - start
+        outcome = {1: "X wins", -1: "O wins", 0: "draw"}[game.score(x, o)]
+        print(f"{f'{m},{n},{k}':<8}{len(depths):>6}{sum(depths) / len(depths):>8.1f}"
+              f"{nodes:>10}{elapsed:>10.2f}{nodes / elapsed:>10.0f}  {outcome}")
+
+
+def profile(call):
+    """
+    Runs call under cProfile. Returns the elapsed seconds, the seconds
+    spent inside board-copying functions and the stats.
+    """
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.runcall(call)
+    elapsed = time.perf_counter() - start
+    stats = pstats.Stats(profiler)
+    copying = sum(
+        cumulative
+        for (filename, _, name), (_, _, _, cumulative, _) in stats.stats.items()
+        if name in ("deepcopy", "result") and (filename.endswith("copy.py") or filename.endswith("tictactoe.py"))
+    )
+    return elapsed, copying, stats
+
+
+def bench_profile(args):
+    """
+    Profiles searching the empty 3x3 board by copying list boards with
+    result() against the bitboard minimax, and the make/unmake engine on
+    m,n,k boards, and reports the time spent copying boards.
+    """
+    depth = int(args[0]) if len(args) > 0 else 6
+    book.table = b""
+    bitboard.game().transpositions.clear()
+
+    runs = {
+        "3x3 list boards": lambda: plain_minimax(ttt.initial_state()),
+        "3x3 minimax": lambda: ttt.minimax(ttt.initial_state()),
+    }
+    for m, n, k in [(4, 4, 4), (5, 5, 4)]:
+        game = bitboard.game(m, n, k)
+        runs[f"{m},{n},{k} depth {depth}"] = lambda game=game: engine.search(game, 0, 0, depth=depth)
+
+    print(f"{'search':<20}{'seconds':>10}{'copying':>10}  top functions by own time")
+    for name, call in runs.items():
+        elapsed, copying, stats = profile(call)
+        top = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:3]
+        functions = ", ".join(f"{function} {own / elapsed:.0%}" for (_, _, function), (_, _, own, _, _) in top)
+        print(f"{name:<20}{elapsed:>10.3f}{copying / elapsed:>10.0%}  {functions}")
+
+
+def bench_parallel(args):
+    """
+    Times a fixed-depth search from the empty m,n,k board serially and
+    with the root split across 1, 2, 4, ... worker processes up to the
+    core count, and checks every run chooses the serial move.
+    """
+    depth = int(args[0]) if len(args) > 0 else 8
+    m, n, k = (int(v) for v in args[1].split(",")) if len(args) > 1 else (4, 4, 4)
+    game = bitboard.game(m, n, k)
+
+    start = time.perf_counter()
+    move, score, _, nodes = engine.search(game, 0, 0, depth=depth)
+    serial = time.perf_counter() - start
+
+    counts = []
+    workers = 1
+    while workers < multiprocessing.cpu_count():
+        counts.append(workers)
+        workers *= 2
+    counts.append(multiprocessing.cpu_count())
+
+    print(f"{m},{n},{k} depth {depth}, {multiprocessing.cpu_count()} cores")
+    print(f"{'workers':<10}{'seconds':>10}{'speedup':>10}{'nodes':>12}  move")
+    print(f"{'serial':<10}{serial:>10.3f}{1:>10.2f}{nodes:>12}  {game.cell(move)}")
+    for workers in counts:
+        start = time.perf_counter()
+        parallel_move, parallel_score, _, nodes = engine.parallel_search(game, 0, 0, depth, workers)
+        elapsed = time.perf_counter() - start
+        print(f"{workers:<10}{elapsed:>10.3f}{serial / elapsed:>10.2f}{nodes:>12}  {game.cell(parallel_move)}")
+        if (parallel_move, parallel_score) != (move, score):
+            sys.exit("Parallel search chose a different move.")
+
+
+BENCHMARKS = {
+    "table": bench_table,
+    "book": bench_book,
+    "mnk": bench_mnk,
+    "profile": bench_profile,
+    "parallel": bench_parallel,
+}
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        sys.exit(f"Usage: python benchmark.py [{'|'.join(BENCHMARKS)}] ...")
+    BENCHMARKS[sys.argv[1]](sys.argv[2:])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Bitboard representation of an m x n Tic-Tac-Toe board with k in a row to
+win.
+
+A position is a pair of masks, one for the cells taken by X and one for
+the cells taken by O. Cell (i, j) is bit i * (n + 1) + j: every row has a
+spare bit on its right, so shifting a mask to follow a line never wraps a
+run onto the next row.
+"""
+
+# Largest layout, in bits, that gets precomputed lookup tables
+TABLE_BITS = 12
+
+# Bound kinds of a stored value
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Number of positions searched by the most recent call to Game.value
+nodes_visited = 0
+
+# Shared Game for each (m, n, k)
+games = {}
+
+
+def count(mask):
+    """
+    Returns the number of cells set in mask.
+    """
+    return bin(mask).count("1")
+
+
+def game(m=3, n=3, k=3):
+    """
+    Returns the shared Game for an m x n board with k in a row to win.
+    """
+    if (m, n, k) not in games:
+        games[(m, n, k)] = Game(m, n, k)
+    return games[(m, n, k)]
+
+
+class Game():
+    """
+    Bit layout and rules of an m x n board with k in a row to win.
+    """
+
+    def __init__(self, m=3, n=3, k=3):
+        self.m = m
+        self.n = n
+        self.k = k
+        self.stride = n + 1
+        self.size = m * self.stride
+        self.full = 0
+        for i in range(m):
+            for j in range(n):
+                self.full |= self.bit(i, j)
+
+        # Shifts that step right, down, down-right and down-left
+        self.directions = [1, self.stride, self.stride + 1, self.stride - 1]
+
+        # Every run of k cells that wins when one player holds all of it
+        self.lines = []
+        for d in self.directions:
+            for start in range(self.size):
+                line = 0
+                for step in range(k):
+                    line |= 1 << (start + step * d)
+                if line & self.full == line:
+                    self.lines.append(line)
+
+        # Transposition table: position key -> (value, bound)
+        self.transpositions = {}
+
+        # Small boards look wins and symmetric images up in tables
+        self.won_table = None
+        self.symmetry_tables = None
+        if self.size <= TABLE_BITS:
+            self.won_table = [self.has_line(mask) for mask in range(1 << self.size)]
+            self.symmetry_tables = [self.permutation_table(t) for t in self.symmetries()]
+
+    def bit(self, i, j):
+        """
+        Returns the bit of cell (i, j).
+        """
+        return 1 << (i * self.stride + j)
+
+    def cell(self, bit):
+        """
+        Returns the (i, j) cell of a single bit.
+        """
+        return divmod(bit.bit_length() - 1, self.stride)
+
+    def from_board(self, board):
+        """
+        Returns the (x, o) masks of a list board.
+        """
+        x = o = 0
+        for i, row in enumerate(board):
+            bit = 1 << (i * self.stride)
+            for cell in row:
+                if cell == "X":
+                    x |= bit
+                elif cell == "O":
+                    o |= bit
+                bit <<= 1
+        return x, o
+
+    def to_board(self, x, o):
+        """
+        Returns the list board of the (x, o) masks.
+        """
+        return [
+            ["X" if x & self.bit(i, j) else "O" if o & self.bit(i, j) else None
+             for j in range(self.n)]
+            for i in range(self.m)
+        ]
+
+    def has_line(self, mask):
+        """
+        Returns True if mask holds k cells in a row, by shifting it along
+        each direction and keeping cells that start a run.
+        """
+        for d in self.directions:
+            run = mask
+            for step in range(1, self.k):
+                run &= mask >> (step * d)
+                if not run:
+                    break
+            if run:
+                return True
+        return False
+
+    def won(self, mask):
+        """
+        Returns True if the cells in mask complete a line.
+        """
+        if self.won_table is not None:
+            return self.won_table[mask]
+        return self.has_line(mask)
+
+    def x_to_move(self, x, o):
+        """
+        Returns True if X moves next.
+        """
+        return count(x) == count(o)
+
+    def moves(self, x, o):
+        """
+        Yields the bit of every empty cell, lowest first.
+        """
+        free = self.full & ~(x | o)
+        while free:
+            bit = free & -free
+            yield bit
+            free ^= bit
+
+    def score(self, x, o):
+        """
+        Returns 1 if X has a line, -1 if O has one, 0 otherwise.
+        """
+        if self.won(x):
+            return 1
+        if self.won(o):
+            return -1
+        return 0
+
+    def over(self, x, o):
+        """
+        Returns True if a player has a line or the board is full.
+        """
+        return self.won(x) or self.won(o) or x | o == self.full
+
+    def symmetries(self):
+        """
+        Returns the rotations and reflections that map the board onto
+        itself, each as a list giving the bit that lands on each bit.
+        Square boards have 8 of them, other boards 4.
+        """
+        m, n = self.m, self.n
+        maps = [
+            lambda i, j: (i, j),
+            lambda i, j: (m - 1 - i, j),
+            lambda i, j: (i, n - 1 - j),
+            lambda i, j: (m - 1 - i, n - 1 - j),
+        ]
+        if m == n:
+            maps += [
+                lambda i, j: (j, i),
+                lambda i, j: (n - 1 - j, i),
+                lambda i, j: (j, m - 1 - i),
+                lambda i, j: (n - 1 - j, m - 1 - i),
+            ]
+        transforms = []
+        for source in maps:
+            transform = list(range(self.size))
+            for i in range(m):
+                for j in range(n):
+                    si, sj = source(i, j)
+                    transform[i * self.stride + j] = si * self.stride + sj
+            transforms.append(transform)
+        return transforms
+
+    def permutation_table(self, transform):
+        """
+        Returns a list mapping every mask to its image under transform,
+        each built from the image of the mask without its lowest bit.
+        """
+        images = [0] * self.size
+        for target, source in enumerate(transform):
+            images[source] |= 1 << target
+        table = [0] * (1 << self.size)
+        for mask in range(1, 1 << self.size):
+            low = mask & -mask
+            table[mask] = table[mask ^ low] | images[low.bit_length() - 1]
+        return table
+
+    def key(self, x, o):
+        """
+        Returns a key for the position, shared with all its rotations and
+        reflections on boards small enough to have symmetry tables.
+        """
+        if self.symmetry_tables is None:
+            return x | o << self.size
+        return min(table[x] | table[o] << self.size for table in self.symmetry_tables)
+
+    def value(self, x, o, alpha=-1, beta=1):
+        """
+        Returns the exact minimax value of the position within the
+        (alpha, beta) window, reusing and filling the transposition table.
+        """
+        global nodes_visited
+        nodes_visited += 1
+
+        if self.won(x):
+            return 1
+        if self.won(o):
+            return -1
+        if x | o == self.full:
+            return 0
+
+        position = self.key(x, o)
+        entry = self.transpositions.get(position)
+        if entry is not None:
+            stored, bound = entry
+            if (bound == EXACT or (bound == LOWER and stored >= beta) or
+                    (bound == UPPER and stored <= alpha)):
+                return stored
+
+        alpha_start, beta_start = alpha, beta
+        if self.x_to_move(x, o):
+            best = -2
+            for bit in self.moves(x, o):
+                best = max(best, self.value(x | bit, o, alpha, beta))
+                alpha = max(alpha, best)
+                if alpha >= beta:
+                    break
+        else:
+            best = 2
+            for bit in self.moves(x, o):
+                best = min(best, self.value(x, o | bit, alpha, beta))
+                beta = min(beta, best)
+                if beta <= alpha:
+                    break
+
+        if best <= alpha_start:
+            self.transpositions[position] = (best, UPPER)
+        elif best >= beta_start:
+            self.transpositions[position] = (best, LOWER)
+        else:
+            self.transpositions[position] = (best, EXACT)
+        return best
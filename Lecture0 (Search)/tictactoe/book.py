@@ -0,0 +1,137 @@
+"""
+Solved-position table for 3 x 3 Tic-Tac-Toe.
+
+Every board is indexed by its base-3 encoding, reading cells row by row
+with EMPTY as 0, X as 1 and O as 2. Each of the 3^9 entries is one byte:
+
+    0xFF        board not reachable from the initial state
+    bits 0-3    flat index 3 * i + j of the optimal move, 15 if the game is over
+    bits 4-5    minimax value + 1
+
+Usage: python book.py
+"""
+
+import os
+import struct
+import sys
+
+import bitboard
+
+FILENAME = "tictactoe.book"
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), FILENAME)
+MAGIC = b"TTTBOOK\0"
+VERSION = 1
+
+# magic, version, reachable positions
+HEADER = struct.Struct("<8sII")
+
+ENTRIES = 3 ** 9
+UNREACHABLE = 0xFF
+NO_MOVE = 15
+
+# Entries of the loaded book, b"" if there is none; None until first use
+table = None
+
+
+def index(board):
+    """
+    Returns the base-3 encoding of a 3 x 3 board.
+    """
+    code = 0
+    for row in board:
+        for cell in row:
+            code = code * 3 + (0 if cell is None else 1 if cell == "X" else 2)
+    return code
+
+
+def solve():
+    """
+    Returns the table for every position reachable from the initial
+    state, with the move tictactoe.minimax chooses there.
+    """
+    import tictactoe as ttt
+
+    # Search every position rather than answer from an older book
+    global table
+    table = b""
+
+    game = bitboard.game()
+    entries = bytearray([UNREACHABLE]) * ENTRIES
+    frontier = [ttt.initial_state()]
+    while frontier:
+        board = frontier.pop()
+        code = index(board)
+        if entries[code] != UNREACHABLE:
+            continue
+        value = game.value(*game.from_board(board))
+        if ttt.terminal(board):
+            entries[code] = (value + 1) << 4 | NO_MOVE
+            continue
+        i, j = ttt.minimax(board)
+        entries[code] = (value + 1) << 4 | (3 * i + j)
+        for action in ttt.actions(board):
+            frontier.append(ttt.result(board, action))
+
+    table = None
+    return bytes(entries)
+
+
+def save(entries, path=PATH):
+    """
+    Writes the book, replacing any previous one.
+    """
+    positions = len(entries) - entries.count(UNREACHABLE)
+    with open(path + ".tmp", "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, positions))
+        f.write(entries)
+    os.replace(path + ".tmp", path)
+
+
+def load(path=PATH):
+    """
+    Returns the entries of the book at `path`, or None if it is missing
+    or not a book of this version.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    if len(data) != HEADER.size + ENTRIES:
+        return None
+    magic, version, _ = HEADER.unpack_from(data)
+    if (magic != MAGIC or version != VERSION):
+        return None
+    return data[HEADER.size:]
+
+
+def lookup(board):
+    """
+    Returns (action, value) for a 3 x 3 board from the book, loading it
+    on first use. The action is None if the game is over. Returns None if
+    there is no book or the board is not in it.
+    """
+    global table
+    if table is None:
+        table = load() or b""
+    if not table:
+        return None
+
+    entry = table[index(board)]
+    if entry == UNREACHABLE:
+        return None
+    move = entry & 0xF
+    action = None if move == NO_MOVE else divmod(move, 3)
+    return action, (entry >> 4) - 1
+
+
+def main():
+    entries = solve()
+    save(entries)
+    positions = len(entries) - entries.count(UNREACHABLE)
+    print(f"Solved {positions} positions into {PATH}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Depth-limited search for m,n,k boards too large to solve exhaustively.
+
+Search runs iterative-deepening negamax alpha-beta over bitboards, scores
+unfinished positions with a line-count heuristic, orders moves by the
+transposition table, killer moves and the history heuristic, and stops
+at a time limit with the move of the deepest finished iteration.
+
+parallel_search splits the root of a fixed-depth search across worker
+processes that share the best score found so far.
+"""
+
+import multiprocessing
+import time
+
+import bitboard
+from bitboard import EXACT, LOWER, UPPER, count
+
+# Score of a won position, less one per ply it takes to reach
+WIN = 10 ** 9
+
+# Scores within this margin of WIN are proven wins or losses
+PROVEN = WIN - 10 ** 4
+
+# Nodes searched between checks of the clock
+CLOCK_INTERVAL = 1024
+
+# Killer moves remembered per ply
+KILLERS = 2
+
+# Best root score found so far, shared by the parallel search's workers
+shared_alpha = None
+
+# Move ordering learned by the serial iterations, copied to each worker
+shared_ordering = None
+
+
+class Timeout(Exception):
+    """Raised inside the search when the time limit has passed."""
+
+
+class Search():
+    """
+    One iterative-deepening search with its own transposition table,
+    killer moves and history scores.
+
+    The search keeps a single position: make places a mark, updating the
+    masks, the count of each player's marks on every line and the
+    heuristic score, and unmake takes it back, so no node copies or
+    rescans the board.
+    """
+
+    def __init__(self, game, time_limit=None):
+        self.game = game
+        self.deadline = None if time_limit is None else time.perf_counter() + time_limit
+        self.nodes = 0
+        self.table = {}
+        self.killers = {}
+        self.history = {}
+
+        # Line heuristic: a line held only by one player is worth more
+        # the more of its k cells that player already has
+        self.weights = [0] + [10 ** stones for stones in range(1, game.k)] + [0]
+
+        # Lines through each cell; central cells lie on more lines, so
+        # they are tried first on ties. A cell may lie on no line at all
+        # when k is longer than the board
+        self.cell_lines = {bit: [] for bit in game.moves(0, 0)}
+        for number, line in enumerate(game.lines):
+            for bit in game.moves(0, game.full & ~line):
+                self.cell_lines[bit].append(number)
+        self.centrality = {bit: len(lines) for bit, lines in self.cell_lines.items()}
+
+        # The searched position: masks and line counts of X and O, the
+        # player to move, the heuristic score for X and whether the last
+        # mark completed a line
+        self.masks = [0, 0]
+        self.counts = [[0] * len(game.lines), [0] * len(game.lines)]
+        self.side = 0
+        self.score = 0
+        self.won = False
+
+    def set_position(self, x, o):
+        """
+        Makes the marks of (x, o) from the empty board.
+        """
+        self.masks = [0, 0]
+        self.counts = [[0] * len(self.game.lines), [0] * len(self.game.lines)]
+        self.side = 0
+        self.score = 0
+        self.won = False
+        xs = list(self.game.moves(0, self.game.full & ~x))
+        os = list(self.game.moves(0, self.game.full & ~o))
+        for number in range(len(xs) + len(os)):
+            self.make(xs[number // 2] if number % 2 == 0 else os[number // 2])
+        if self.game.won(x) or self.game.won(o):
+            self.won = True
+
+    def make(self, bit):
+        """
+        Places the mark of the player to move on the cell of bit.
+        """
+        side = self.side
+        mine = self.counts[side]
+        theirs = self.counts[1 - side]
+        weights = self.weights
+        sign = 1 if side == 0 else -1
+        for number in self.cell_lines[bit]:
+            if not theirs[number]:
+                before = mine[number]
+                mine[number] = before + 1
+                self.score += sign * (weights[before + 1] - weights[before])
+                if before + 1 == self.game.k:
+                    self.won = True
+            else:
+                if not mine[number]:
+                    self.score += sign * weights[theirs[number]]
+                mine[number] += 1
+        self.masks[side] |= bit
+        self.side = 1 - side
+
+    def unmake(self, bit):
+        """
+        Takes back the mark on the cell of bit, made by the player who
+        moved last.
+        """
+        side = 1 - self.side
+        mine = self.counts[side]
+        theirs = self.counts[1 - side]
+        weights = self.weights
+        sign = 1 if side == 0 else -1
+        for number in self.cell_lines[bit]:
+            after = mine[number] - 1
+            mine[number] = after
+            if not theirs[number]:
+                self.score -= sign * (weights[after + 1] - weights[after])
+            elif not after:
+                self.score -= sign * weights[theirs[number]]
+        self.masks[side] ^= bit
+        self.side = side
+        self.won = False
+
+    def run(self, x, o, depth=None):
+        """
+        Searches the position one ply deeper at a time, up to `depth` plies
+        or the end of the game, until the time limit passes or a win or
+        loss is proven. Returns (move bit, score, depth) for the deepest
+        finished iteration, with the score from the side to move's view.
+        """
+        self.set_position(x, o)
+        empty = count(self.game.full & ~(x | o))
+        limit = empty if depth is None else min(depth, empty)
+        root = (x, o)
+
+        best = None
+        for current in range(1, limit + 1):
+            try:
+                score = self.negamax(current, -WIN, WIN, 0)
+            except Timeout:
+                self.set_position(x, o)
+                break
+            best = (self.table[root][3], score, current)
+            if abs(score) >= PROVEN:
+                break
+
+        # Out of time before the first iteration finished
+        if best is None:
+            best = (self.order(0, None)[0], 0, 0)
+        return best
+
+    def negamax(self, depth, alpha, beta, ply):
+        """
+        Returns the score of the position for the player to move,
+        searched `depth` plies deep within (alpha, beta).
+        """
+        self.nodes += 1
+        if (self.deadline is not None and self.nodes % CLOCK_INTERVAL == 0 and
+                time.perf_counter() > self.deadline):
+            raise Timeout
+
+        x, o = self.masks
+        if self.won:
+            return ply - WIN
+        if x | o == self.game.full:
+            return 0
+        if depth == 0:
+            return self.score if self.side == 0 else -self.score
+
+        key = (x, o)
+        entry = self.table.get(key)
+        hint = None
+        if entry is not None:
+            stored_depth, stored, bound, hint = entry
+            if stored_depth >= depth and (
+                    bound == EXACT or (bound == LOWER and stored >= beta) or
+                    (bound == UPPER and stored <= alpha)):
+                return stored
+
+        alpha_start = alpha
+        best, best_move = -WIN - 1, None
+        for bit in self.order(ply, hint):
+            self.make(bit)
+            score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            self.unmake(bit)
+            if score > best:
+                best, best_move = score, bit
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                killers = self.killers.setdefault(ply, [])
+                if bit not in killers:
+                    killers.insert(0, bit)
+                    del killers[KILLERS:]
+                self.history[bit] = self.history.get(bit, 0) + depth * depth
+                break
+
+        if best <= alpha_start:
+            bound = UPPER
+        elif best >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table[key] = (depth, best, bound, best_move)
+        return best
+
+    def order(self, ply, hint):
+        """
+        Returns the empty cells, with the transposition table's best move
+        first, then killer moves, then by history score and centrality.
+        """
+        killers = self.killers.get(ply, [])
+
+        def rank(bit):
+            return (bit == hint, bit in killers,
+                    self.history.get(bit, 0), self.centrality.get(bit, 0))
+
+        return sorted(self.game.moves(*self.masks), key=rank, reverse=True)
+
+
+def search(game, x, o, depth=None, time_limit=None):
+    """
+    Returns (move bit, score, depth, nodes) for the position from an
+    iterative-deepening search limited by `depth` plies and `time_limit`
+    seconds.
+    """
+    engine = Search(game, time_limit)
+    move, score, reached = engine.run(x, o, depth)
+    return move, score, reached, engine.nodes
+
+
+def parallel_search(game, x, o, depth, workers=None):
+    """
+    Returns (move bit, score, depth, nodes) for the position searched
+    `depth` plies deep, with the same move and score as search, using
+    `workers` processes.
+
+    Iterations before the last run serially, which also fixes the root
+    move order. In the last one the first root move is searched alone to
+    set alpha, and the younger moves are then split across the pool.
+    Each worker starts from the best score found so far and raises it
+    when it finds a better one. Workers search with alpha one below the
+    shared score, so a move that ties the best gets its exact score and
+    the first best move in root order is chosen, as the serial search
+    does.
+    """
+    engine = Search(game)
+    move, score, reached = engine.run(x, o, depth - 1) if depth > 1 else (None, 0, 0)
+    empty = count(game.full & ~(x | o))
+    if abs(score) >= PROVEN or reached >= empty:
+        return move, score, reached, engine.nodes
+
+    engine.set_position(x, o)
+    hint = engine.table[(x, o)][3] if (x, o) in engine.table else None
+    order = engine.order(0, hint)
+
+    # The eldest brother sets alpha before the others start
+    engine.make(order[0])
+    scores = [-engine.negamax(depth - 1, -WIN, WIN, 1)]
+    engine.unmake(order[0])
+    nodes = engine.nodes
+
+    alpha = multiprocessing.Value("q", scores[0])
+    tasks = [(game.m, game.n, game.k, x, o, bit, depth) for bit in order[1:]]
+    ordering = (engine.history, engine.killers)
+    with multiprocessing.Pool(workers, initializer=init_worker, initargs=(alpha, ordering)) as pool:
+        for score, searched in pool.imap(search_root_move, tasks):
+            scores.append(score)
+            nodes += searched
+
+    best = max(scores)
+    return order[scores.index(best)], best, depth, nodes
+
+
+def init_worker(alpha, ordering):
+    """
+    Keeps the shared best root score and the serial iterations' history
+    and killer moves for the worker's searches.
+    """
+    global shared_alpha, shared_ordering
+    shared_alpha = alpha
+    shared_ordering = ordering
+
+
+def search_root_move(task):
+    """
+    Searches one root move with alpha one below the shared best score.
+    Returns the move's score, exact if it is at least that best score,
+    and the nodes searched.
+    """
+    m, n, k, x, o, bit, depth = task
+    engine = Search(bitboard.game(m, n, k))
+    history, killers = shared_ordering
+    engine.history = dict(history)
+    engine.killers = {ply: list(moves) for ply, moves in killers.items()}
+    engine.set_position(x, o)
+    engine.make(bit)
+    score = -engine.negamax(depth - 1, -WIN, 1 - shared_alpha.value, 1)
+    with shared_alpha.get_lock():
+        if score > shared_alpha.value:
+            shared_alpha.value = score
+    return score, engine.nodes
@@ -1,67 +1,67 @@
 """
 Tic Tac Toe Player
+
+Boards are m x n lists of lists, 3 x 3 by default, and a player wins with
+k of their marks in a row, column or diagonal.
 """
 
 import math
-from copy import deepcopy
+
+import bitboard
+import book
+import engine
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Marks in a row needed to win #
+K = 3
+
+# Seconds minimax may spend on a board it cannot solve exhaustively #
+TIME_LIMIT = 1.0
 
-def initial_state():
+
+def initial_state(m=3, n=3):
     """
     Returns starting state of the board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * n for _ in range(m)]
 
 
-def player(board):
+def rules(board, k=K):
     """
-    Returns player who has the next turn on a board.
+    Returns the bitboard Game for the board's shape and k.
     """
+    return bitboard.game(len(board), len(board[0]), k)
 
-    # Initialize the counter #
-    cnt = 0
 
-    # Count the empty boxes in the grid #
-    for lst in board:
-        cnt += lst.count(EMPTY)
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
 
-    # Return the player #
-    if (cnt % 2 == 0):
-        return O
-    else:
+    # X moves when both players have taken as many cells #
+    game = rules(board)
+    if game.x_to_move(*game.from_board(board)):
         return X
+    else:
+        return O
 
 
-def actions(board):
+def actions(board, k=K):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
 
-    # Create a set "moves" #
-    moves = set()
-
-    # Iteratively check every box #
-    for i in range(3):
-        for j in range(3):
-
-            # Check if box is EMPTY #
-            if (board[i][j] is None):
-
-                # Add to the set #
-                moves.add((i, j))
-
-    # Check if set is empty i.e. terminal state #
-    if terminal(board):
+    # Check if terminal state #
+    game = rules(board, k)
+    x, o = game.from_board(board)
+    if game.over(x, o):
         return None
 
     # Else return all possible moves #
-    return moves
+    return {game.cell(bit) for bit in game.moves(x, o)}
 
 
 def result(board, action):
@@ -71,191 +71,118 @@ def result(board, action):
     # check if the action is valid #
     if (board[action[0]][action[1]] != None):
         raise ValueError("Invalid Action !")
-        #return
-
-    # Create a DeepCopy of the Board #
-    boardcopy = deepcopy(board)
 
-    # Get the Player #
-    Player = player(boardcopy)
+    # Copy the rows, leaving the given board unchanged #
+    boardcopy = [row[:] for row in board]
 
     # Make the move #
-    boardcopy[action[0]][action[1]] = Player
+    boardcopy[action[0]][action[1]] = player(board)
 
     # Return the resulting board #
     return boardcopy
 
 
-def winner(board):
+def winner(board, k=K):
     """
     Returns the winner of the game, if there is one.
     """
 
-    # Check Rows #
-    def checkRow(board):
-        for row in board :
-            # Check for X #
-            if (row.count(X) == 3):
-                return X
-
-            # Check for O #
-            elif (row.count(O) == 3):
-                return O
-
-        # no winner in rows #
-        return None
-
-    # Check Cols #
-    def checkCols(board):
-        for i in range(3):
-            # Check for X #
-            if(board[0][i] is X and board[1][i] is X and
-                board[2][i] is X):
-                return X
-
-            # Check for O #
-            if(board[0][i] == O and board[1][i] == O and
-                board[2][i] == O):
-                return O
-
-        # No winner in Columns #
-        return None
-
-    # Check Diagonals #
-    def checkDiags(board):
-        # Check X for Left Diagonal #
-        if(board[0][0] == X and board[1][1] == X and
-            board[2][2] == X):
-            return X
-
-        # Check X for Right Diagonal #
-        elif(board[2][0] == X and board[1][1] == X and
-            board[0][2] == X):
-            return X
-
-        # Check O for Left Diagonal #
-        elif(board[0][0] == O and board[1][1] == O and
-            board[2][2] == O):
-            return O
-
-        # Check X for Right Diagonal #
-        elif(board[2][0] == O and board[1][1] == O and
-            board[0][2] == O):
-            return O
-
-        # No Winner in Diagonals #
-        return None
-
-    # Check for the winners #
-    row_win = checkRow(board)
-    col_win = checkCols(board)
-    diag_win = checkDiags(board)
-
-    # Return the Winner #
-    if (row_win is not None):
-        return row_win
-    elif (col_win is not None):
-        return col_win
-    elif (diag_win is not None):
-        return diag_win
+    # Check every line for each player #
+    game = rules(board, k)
+    x, o = game.from_board(board)
+    if game.won(x):
+        return X
+    elif game.won(o):
+        return O
     else:
         return None
 
 
-def terminal(board):
+def terminal(board, k=K):
     """
     Returns True if game is over, False otherwise.
     """
+    game = rules(board, k)
+    return game.over(*game.from_board(board))
 
-    # Check if we have a Winner  #
-    Winner = winner(board)
-    if (Winner is X or Winner is O):
-        return True
 
-    # Check if Board is completely filled #
-    for row in board:
-        if (None in row):
-            return False
-
-    return True
-
-
-def utility(board):
+def utility(board, k=K):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-
-    # Get the winner #
-    Winner = winner(board)
-
-    # return the Winner #
-    if (Winner is X):
-        return 1
-    elif (Winner is O):
-        return -1
-    else:
-        return 0
+    game = rules(board, k)
+    return game.score(*game.from_board(board))
 
 
-def minimax(board):
+def minimax(board, k=K, time_limit=None, depth=None, workers=None):
     """
     Returns the optimal action for the current player on the board.
-    """
 
-    # Max-Value Function #
-    def maxValue(board, alpha, beta):
-        #check if the board is Terminal #
-        if terminal(board):
-            return utility(board)
+    On 3 x 3 boards the action is looked up in the solved-position table
+    written by book.py, when it exists. Otherwise boards small enough for
+    symmetry tables, such as 3 x 3, are solved exactly on bitboards unless
+    a time limit is given. Values of positions already searched, in this
+    call or an earlier one, are reused from the transposition table,
+    which is shared between boards that are rotations or reflections of
+    each other.
 
-        # Initialize the value #
-        value = -2
-        for act in actions(board):
-            value = max(value, minValue(result(board, act), alpha, beta))
-            alpha = max(alpha, value)
+    Larger boards get the move of an iterative-deepening search that
+    stops after `time_limit` seconds, TIME_LIMIT by default, or after
+    `depth` plies if given. A depth-limited search can split its root
+    moves across `workers` processes and still return the same move.
+    """
+    if (workers is not None and depth is None):
+        raise ValueError("Parallel search needs a depth !")
 
-            # Prune - Beta cutoff #
-            if (alpha >= beta):
-                break
+    game = rules(board, k)
+    x, o = game.from_board(board)
 
-        # Return Max-Value #
-        return value
+    # Search to a fixed depth, across processes if asked #
+    if (depth is not None):
+        if (workers is not None):
+            move, _, _, _ = engine.parallel_search(game, x, o, depth, workers)
+        else:
+            move, _, _, _ = engine.search(game, x, o, depth=depth)
+        return game.cell(move)
 
-    # Min-Value Function #
-    def minValue(board, alpha, beta):
-        #check if the board is Terminal #
-        if terminal(board):
-            return utility(board)
+    # Search large boards to the depth the time limit allows #
+    if (game.symmetry_tables is None or time_limit is not None):
+        if time_limit is None:
+            time_limit = TIME_LIMIT
+        move, _, _, _ = engine.search(game, x, o, time_limit=time_limit)
+        return game.cell(move)
 
-        # Initialize the value #
-        value = 2
-        for act in actions(board):
-            value = min(value, maxValue(result(board, act), alpha, beta))
-            beta = min(beta, value)
+    # Answer solved positions from the book #
+    if ((game.m, game.n, game.k) == (3, 3, 3)):
+        entry = book.lookup(board)
+        if (entry is not None and entry[0] is not None):
+            return entry[0]
 
-            # Prune - Alpha cutoff #
-            if (beta <= alpha):
-                break
+    return best_action(board, k)
 
-        # Return Min-Value #
-        return value
 
-    # Set alpha beta to min and max utility #
-    alpha = -1
-    beta = 1
+def best_action(board, k=K):
+    """
+    Returns the optimal action for the current player on a board small
+    enough for symmetry tables, found by exact search on bitboards
+    without the solved-position table.
+    """
+    game = rules(board, k)
+    x, o = game.from_board(board)
+    bitboard.nodes_visited = 0
 
     # If Maximizing Player #
-    if (player(board) is X):
+    if game.x_to_move(x, o):
         maxi = -5
-        for act in actions(board):
-            value = minValue(result(board, act), alpha, beta)
+        for act in actions(board, k):
+            value = game.value(x | game.bit(*act), o)
             if (value > maxi):
                 maxi = value
                 Action = act
     else:
         mini = 5
-        for act in actions(board):
-            value = maxValue(result(board, act), alpha, beta)
+        for act in actions(board, k):
+            value = game.value(x, o | game.bit(*act))
             if (value < mini):
                 mini = value
                 Action = act
@@ -0,0 +1,166 @@
+"""
+Headless self-play tournament between Tic-Tac-Toe engines.
+
+Usage: python tournament.py [games] [workers] [engines...]
+
+Plays `games` games for every ordered pair of the given engines, each
+engine taking both X and O, across a pool of worker processes. Prints
+moves per second, per-move latency percentiles and nodes searched for
+each engine, and the outcomes of each pairing. Exits with an error if
+an optimal engine lost a game.
+"""
+
+import multiprocessing
+import random
+import sys
+import time
+from collections import Counter
+
+import bitboard
+import book
+import engine
+import tictactoe as ttt
+
+# Engines that play perfectly and so must never lose
+OPTIMAL = ["minimax", "search", "engine", "book"]
+
+# Latency percentiles to report
+PERCENTILES = [50, 90, 99]
+
+
+def play_minimax(board, rng):
+    """The move tictactoe.minimax plays, from the book when it exists."""
+    bitboard.nodes_visited = 0
+    return ttt.minimax(board), bitboard.nodes_visited
+
+
+def play_search(board, rng):
+    """The move of the exact bitboard search, without the book."""
+    return ttt.best_action(board), bitboard.nodes_visited
+
+
+def play_engine(board, rng):
+    """The move of the iterative-deepening engine searched to the end."""
+    game = ttt.rules(board)
+    move, _, _, nodes = engine.search(game, *game.from_board(board))
+    return game.cell(move), nodes
+
+
+def play_book(board, rng):
+    """The move stored in the solved-position table."""
+    return book.lookup(board)[0], 0
+
+
+def play_random(board, rng):
+    """A uniformly random legal move."""
+    return rng.choice(sorted(ttt.actions(board))), 0
+
+
+ENGINES = {
+    "minimax": play_minimax,
+    "search": play_search,
+    "engine": play_engine,
+    "book": play_book,
+    "random": play_random,
+}
+
+
+def main():
+    names = sys.argv[3:] or list(ENGINES)
+    if len(sys.argv) > 1 and not sys.argv[1].isdigit() or any(name not in ENGINES for name in names):
+        sys.exit(f"Usage: python tournament.py [games] [workers] [{'|'.join(ENGINES)} ...]")
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else multiprocessing.cpu_count()
+
+    if "book" in names and book.load() is None:
+        print("Solving the book...")
+        book.save(book.solve())
+
+    tasks = [
+        (x_name, o_name, seed)
+        for x_name in names
+        for o_name in names
+        for seed in range(games)
+    ]
+    start = time.perf_counter()
+    results = run(tasks, workers)
+    elapsed = time.perf_counter() - start
+
+    losses = report(results, elapsed)
+    if losses:
+        sys.exit(f"Optimal engines lost {losses} games.")
+
+
+def run(tasks, workers):
+    """
+    Plays every (X engine, O engine, seed) task across `workers`
+    processes. Returns one result per game, in no particular order.
+    """
+    chunksize = max(1, len(tasks) // (workers * 16))
+    with multiprocessing.Pool(workers) as pool:
+        return list(pool.imap_unordered(play, tasks, chunksize))
+
+
+def play(task):
+    """
+    Plays one game. Returns the X and O engine names, the utility of the
+    final board and (engine, seconds, nodes) for every move.
+    """
+    x_name, o_name, seed = task
+    rng = random.Random(seed)
+    board = ttt.initial_state()
+    moves = []
+    while not ttt.terminal(board):
+        name = x_name if ttt.player(board) == ttt.X else o_name
+        start = time.perf_counter()
+        action, nodes = ENGINES[name](board, rng)
+        moves.append((name, time.perf_counter() - start, nodes))
+        board = ttt.result(board, action)
+    return x_name, o_name, ttt.utility(board), moves
+
+
+def percentile(values, p):
+    """Returns the nearest-rank p-th percentile of sorted values."""
+    return values[max(0, -(-len(values) * p // 100) - 1)]
+
+
+def report(results, elapsed):
+    """
+    Prints per-engine move statistics and per-pairing outcomes. Returns
+    the number of games an optimal engine lost.
+    """
+    latencies = {}
+    nodes = Counter()
+    outcomes = {}
+    losses = 0
+    for x_name, o_name, value, moves in results:
+        for name, seconds, searched in moves:
+            latencies.setdefault(name, []).append(seconds)
+            nodes[name] += searched
+        tally = outcomes.setdefault((x_name, o_name), Counter())
+        tally[{1: "X", -1: "O", 0: "draw"}[value]] += 1
+        if (value == 1 and o_name in OPTIMAL) or (value == -1 and x_name in OPTIMAL):
+            losses += 1
+
+    total_moves = sum(len(values) for values in latencies.values())
+    print(f"Games: {len(results)} in {elapsed:.2f}s, {total_moves / elapsed:.0f} moves/s overall")
+
+    header = "".join(f"{f'p{p} us':>10}" for p in PERCENTILES)
+    print(f"{'engine':<10}{'moves':>8}{'moves/s':>10}{header}{'max us':>10}{'nodes/move':>12}")
+    for name, values in latencies.items():
+        values.sort()
+        rate = len(values) / sum(values) if sum(values) else float("inf")
+        row = "".join(f"{percentile(values, p) * 1e6:>10.1f}" for p in PERCENTILES)
+        print(f"{name:<10}{len(values):>8}{rate:>10.0f}{row}{values[-1] * 1e6:>10.1f}"
+              f"{nodes[name] / len(values):>12.1f}")
+
+    print(f"{'X':<10}{'O':<10}{'X wins':>8}{'O wins':>8}{'draws':>8}")
+    for (x_name, o_name), tally in sorted(outcomes.items()):
+        print(f"{x_name:<10}{o_name:<10}{tally['X']:>8}{tally['O']:>8}{tally['draw']:>8}")
+
+    print(f"Optimal engine losses: {losses}")
+    return losses
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,13 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def tseitin(self, cnf):
+        """
+        Returns a CNF literal that is true exactly when the sentence is,
+        adding the clauses that define it to cnf.
+        """
+        raise Exception("nothing to encode")
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -68,6 +75,9 @@ class Symbol(Sentence):
     def symbols(self):
         return {self.name}
 
+    def tseitin(self, cnf):
+        return cnf.variable(self.name)
+
 
 class Not(Sentence):
     def __init__(self, operand):
@@ -92,6 +102,9 @@ class Not(Sentence):
     def symbols(self):
         return self.operand.symbols()
 
+    def tseitin(self, cnf):
+        return -self.operand.tseitin(cnf)
+
 
 class And(Sentence):
     def __init__(self, *conjuncts):
@@ -129,6 +142,14 @@ class And(Sentence):
     def symbols(self):
         return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
+    def tseitin(self, cnf):
+        literals = [conjunct.tseitin(cnf) for conjunct in self.conjuncts]
+        v = cnf.fresh()
+        for literal in literals:
+            cnf.clauses.append([-v, literal])
+        cnf.clauses.append([v] + [-literal for literal in literals])
+        return v
+
 
 class Or(Sentence):
     def __init__(self, *disjuncts):
@@ -160,6 +181,14 @@ class Or(Sentence):
     def symbols(self):
         return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
+    def tseitin(self, cnf):
+        literals = [disjunct.tseitin(cnf) for disjunct in self.disjuncts]
+        v = cnf.fresh()
+        for literal in literals:
+            cnf.clauses.append([v, -literal])
+        cnf.clauses.append([-v] + literals)
+        return v
+
 
 class Implication(Sentence):
     def __init__(self, antecedent, consequent):
@@ -191,6 +220,15 @@ class Implication(Sentence):
     def symbols(self):
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
 
+    def tseitin(self, cnf):
+        antecedent = self.antecedent.tseitin(cnf)
+        consequent = self.consequent.tseitin(cnf)
+        v = cnf.fresh()
+        cnf.clauses.append([-v, -antecedent, consequent])
+        cnf.clauses.append([v, antecedent])
+        cnf.clauses.append([v, -consequent])
+        return v
+
 
 class Biconditional(Sentence):
     def __init__(self, left, right):
@@ -224,9 +262,127 @@ class Biconditional(Sentence):
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
+    def tseitin(self, cnf):
+        left = self.left.tseitin(cnf)
+        right = self.right.tseitin(cnf)
+        v = cnf.fresh()
+        cnf.clauses.append([-v, -left, right])
+        cnf.clauses.append([-v, left, -right])
+        cnf.clauses.append([v, left, right])
+        cnf.clauses.append([v, -left, -right])
+        return v
+
+
+class CNF():
+    """
+    Clauses in conjunctive normal form, built from sentences by Tseitin
+    encoding so that their size grows linearly with the sentences.
+    Each clause is a list of literals: variable number v for true,
+    -v for false.
+    """
+
+    def __init__(self):
+        self.variables = {}
+        self.clauses = []
+        self.count = 0
+
+    def variable(self, name):
+        """Returns the variable number of a symbol."""
+        if name not in self.variables:
+            self.variables[name] = self.fresh()
+        return self.variables[name]
+
+    def fresh(self):
+        """Returns a new variable number."""
+        self.count += 1
+        return self.count
+
+    def add(self, sentence):
+        """Adds clauses that hold exactly when the sentence is true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append([disjunct.tseitin(self) for disjunct in sentence.disjuncts])
+        else:
+            self.clauses.append([sentence.tseitin(self)])
+
+
+def simplify(clauses, model):
+    """
+    Returns the clauses left under a partial model, without satisfied
+    clauses or false literals, or None if a clause became false.
+    """
+    remaining = []
+    for clause in clauses:
+        reduced = []
+        for literal in clause:
+            value = model.get(abs(literal))
+            if value is None:
+                reduced.append(literal)
+            elif value == (literal > 0):
+                break
+        else:
+            if not reduced:
+                return None
+            remaining.append(reduced)
+    return remaining
+
+
+def dpll(clauses, model=None):
+    """
+    Returns a model, mapping variable numbers to booleans, that satisfies
+    every clause, or None if the clauses are unsatisfiable.
+    """
+    model = dict() if model is None else model.copy()
+    clauses = simplify(clauses, model)
+    while clauses:
+
+        # Unit propagation: a clause with one literal forces it
+        forced = {clause[0] for clause in clauses if len(clause) == 1}
+
+        # Pure literal elimination: a literal whose negation never
+        # appears can be made true without falsifying any clause
+        if not forced:
+            literals = {literal for clause in clauses for literal in clause}
+            forced = {literal for literal in literals if -literal not in literals}
+        if not forced:
+            break
+        for literal in forced:
+            if -literal in forced:
+                return None
+            model[abs(literal)] = literal > 0
+        clauses = simplify(clauses, model)
+
+    if clauses is None:
+        return None
+    if not clauses:
+        return model
+
+    # Branch on a literal from a shortest clause
+    literal = min(clauses, key=len)[0]
+    for value in [literal > 0, literal < 0]:
+        model[abs(literal)] = value
+        result = dpll(clauses, model)
+        if result is not None:
+            return result
+    return None
+
 
 def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    """
+    Checks if knowledge base entails query: it does exactly when
+    knowledge and not query cannot both be true, which DPLL decides on
+    their CNF clauses.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.add(Not(query))
+    return dpll(cnf.clauses) is None
+
+
+def truth_table_check(knowledge, query):
+    """Checks if knowledge base entails query by enumerating every model."""
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""